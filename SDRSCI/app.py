@@ -1,14 +1,37 @@
 import os
+import sys
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
+from sqlalchemy import event
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+try:
+    import orjson
+except ImportError:  # Socket.IO packets fall back to the standard library json module
+    orjson = None
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # Settings come from the process environment only
+    load_dotenv = None
+
+# .env (written by setup_local.py) fills in settings missing from the environment,
+# once at import; everything below reads os.environ a single time too
+if load_dotenv is not None:
+    load_dotenv('.env', override=False)
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+# attached_assets/ holds snapshots of older modules that build their own app and engine;
+# refuse to start if it is importable so two apps can't be initialized side by side
+_ATTACHED_ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'attached_assets')
+if any(os.path.abspath(path or os.curdir) == _ATTACHED_ASSETS_DIR for path in sys.path):
+    raise RuntimeError(f"{_ATTACHED_ASSETS_DIR} must not be on sys.path")
+
 class Base(DeclarativeBase):
     pass
 
@@ -17,33 +40,108 @@ db = SQLAlchemy(model_class=Base)
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "spectrum-sentinels-dev-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+if os.environ.get('BEHIND_PROXY', 'true').lower() == 'true':
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///spectrum_sentinels.db")
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
+    # Sized for the server's worker threads (THREADS, used by Waitress) plus the
+    # file monitor and broadcaster threads
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", max(20, int(os.environ.get("THREADS", 4)) * 2))),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+    "pool_timeout": 30,
+    # Room for every distinct ORM/lazy-load statement so they stay compiled
+    "query_cache_size": 1200,
+    # Rows per multi-row INSERT when detections are written with executemany
+    "insertmanyvalues_page_size": 1000,
 }
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    # Pooled SQLite connections are handed between request and background threads
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {"check_same_thread": False}
+elif app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgres"):
+    # Each statement sees rows committed by the file monitor and detector threads
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["isolation_level"] = "READ COMMITTED"
+    if app.config["SQLALCHEMY_DATABASE_URI"].split("://", 1)[0] in ("postgresql", "postgresql+psycopg2"):
+        # psycopg2 (the default postgres driver) batches executemany into VALUES pages
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"]["executemany_mode"] = "values_plus_batch"
 
 # Upload configuration
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
+app.config['MAX_FORM_MEMORY_SIZE'] = 1024 * 1024  # Non-file form fields stay small
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600
 app.config['SDR_SHARP_PATH'] = os.environ.get('SDR_SHARP_PATH', r'C:\Users\coraj\OneDrive\Desktop\sdrsharp-x86')
 app.config['AUDIO_DIRECTORY'] = os.environ.get('AUDIO_DIRECTORY', 'audio_recordings')
 
-# Ensure upload directories exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['AUDIO_DIRECTORY'], exist_ok=True)
+# File compression
+app.config['COMPRESSION_ENABLED'] = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+# Real-time configuration
+app.config['REALTIME_UPDATES'] = os.environ.get('REALTIME_UPDATES', 'true').lower() == 'true'
+app.config['WEBSOCKET_PING_INTERVAL'] = int(os.environ.get('WEBSOCKET_PING_INTERVAL', 25))
+app.config['WEBSOCKET_PING_TIMEOUT'] = int(os.environ.get('WEBSOCKET_PING_TIMEOUT', 60))
+# 'native' (inotify/FSEvents/ReadDirectoryChanges), 'polling', or 'auto' to poll only on network filesystems
+app.config['FILE_MONITOR_BACKEND'] = os.environ.get('FILE_MONITOR_BACKEND', 'auto').lower()
+
+# Ensure upload directories exist (only the first process on a host needs the mkdir)
+for _directory in (app.config['UPLOAD_FOLDER'], app.config['AUDIO_DIRECTORY']):
+    if not os.path.isdir(_directory):
+        os.makedirs(_directory, exist_ok=True)
+
+class OrjsonPacketJSON:
+    """json-module interface over orjson for encoding Socket.IO packets; still plain JSON on the wire"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
 
 # Initialize extensions
 db.init_app(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+_socketio_options = {'json': OrjsonPacketJSON} if orjson is not None else {}
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=os.environ.get('SOCKETIO_ASYNC_MODE', 'threading'),
+    # Redis URL lets several server processes share broadcasts (e.g. gunicorn -k eventlet -w 4)
+    message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+    ping_interval=app.config['WEBSOCKET_PING_INTERVAL'],
+    ping_timeout=app.config['WEBSOCKET_PING_TIMEOUT'],
+    **_socketio_options
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling so detection inserts don't block dashboard reads"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64MB
+    cursor.close()
 
 with app.app_context():
-    # Import models to ensure tables are created
-    import models
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        event.listen(db.engine, "connect", _set_sqlite_pragmas)
+
+# Import models so mappers are registered; schema creation happens once via `flask init-db`
+import models
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create database tables and migrate existing SQLite schemas"""
     db.create_all()
+    from migrate_database import migrate_database
+    migrate_database()
+    logging.info("Database tables created")
 
 # Import routes after app initialization
 import routes
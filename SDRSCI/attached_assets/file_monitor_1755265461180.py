@@ -27,7 +27,17 @@ class AudioFileHandler(FileSystemEventHandler):
         if event.is_directory:
             return
             
-        file_path = event.src_path
+        self._schedule_file(event.src_path)
+    
+    def on_moved(self, event):
+        """Handle files renamed into place (e.g. recorders that write to a temp name first)"""
+        if event.is_directory:
+            return
+        
+        self._schedule_file(event.dest_path)
+    
+    def _schedule_file(self, file_path):
+        """Queue an audio file for processing once it has finished being written"""
         filename = os.path.basename(file_path)
         file_ext = os.path.splitext(filename)[1].lower()
         
@@ -94,13 +104,10 @@ class AudioFileHandler(FileSystemEventHandler):
     
     def calculate_file_hash(self, file_path):
         """Calculate SHA-256 hash of file for duplicate detection"""
-        hash_sha256 = hashlib.sha256()
         try:
             with open(file_path, "rb") as f:
-                # Read in chunks to handle large files
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+                # file_digest hashes straight from the file buffer without Python-level chunk copies
+                return hashlib.file_digest(f, "sha256").digest()
         except Exception as e:
             logging.error(f"Error calculating hash for {file_path}: {str(e)}")
             return None
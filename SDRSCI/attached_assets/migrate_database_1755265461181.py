@@ -28,7 +28,7 @@ def migrate_database():
             print("✓ Added processing_completed_at column")
         
         if 'file_hash' not in columns:
-            cursor.execute("ALTER TABLE recording ADD COLUMN file_hash VARCHAR(64)")
+            cursor.execute("ALTER TABLE recording ADD COLUMN file_hash BLOB")
             print("✓ Added file_hash column")
             
         if 'auto_detected' not in columns:
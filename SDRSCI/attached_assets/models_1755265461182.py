@@ -2,34 +2,45 @@ from app import db
 from datetime import datetime
 from sqlalchemy import Text, Float, Integer, String, DateTime, Boolean
 
+# Labels produced by RFIDetector's classifiers
+INTERFERENCE_TYPES = (
+    'FM_broadcast', 'TV_broadcast', 'UHF_TV', 'WiFi_ISM', 'strong_local', 'moderate', 'weak_signal',
+    'broadband', 'narrowband', 'strong_interference', 'fm_broadcast', 'am_broadcast', 'wifi', 'unknown'
+)
+
 class Recording(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False, default='')
     original_filename = db.Column(db.String(255), nullable=False, default='')
-    file_path = db.Column(db.String(500), nullable=False, default='')
+    file_path = db.Column(db.String(260), nullable=False, default='')  # Windows MAX_PATH
     file_size = db.Column(db.Integer, nullable=False, default=0)
-    upload_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    upload_timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     sample_rate = db.Column(db.Integer, nullable=True)
     duration = db.Column(db.Float, nullable=True)
     frequency_range = db.Column(db.String(100), nullable=True)
-    processed = db.Column(db.Boolean, default=False)
+    processed = db.Column(db.Boolean, default=False, index=True)
     rfi_detected = db.Column(db.Boolean, default=False)
     processing_completed_at = db.Column(db.DateTime, nullable=True)
-    file_hash = db.Column(db.String(64), nullable=True, index=True)
+    file_hash = db.Column(db.LargeBinary(32), nullable=True, index=True, unique=True)  # Raw SHA-256 digest
     auto_detected = db.Column(db.Boolean, default=False, nullable=False)
     
     # Relationship to RFI detections
-    rfi_detections = db.relationship('RFIDetection', backref='recording', lazy=True, cascade='all, delete-orphan')
+    rfi_detections = db.relationship('RFIDetection', backref='recording', lazy='selectin', cascade='all, delete-orphan')
 
 class RFIDetection(db.Model):
+    __table_args__ = (
+        db.Index('ix_rfi_rec_time', 'recording_id', 'timestamp'),
+        db.Index('ix_rfi_freq', 'frequency'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    recording_id = db.Column(db.Integer, db.ForeignKey('recording.id'), nullable=False)
-    timestamp = db.Column(db.Float, nullable=False)  # Time in seconds from start of recording
+    recording_id = db.Column(db.Integer, db.ForeignKey('recording.id'), nullable=False, index=True)
+    timestamp = db.Column(db.Float, nullable=False, index=True)  # Time in seconds from start of recording
     frequency = db.Column(db.Float, nullable=False)  # Frequency in Hz
     power_level = db.Column(db.Float, nullable=False)  # Power level in dB
     bandwidth = db.Column(db.Float)  # Bandwidth of interference in Hz
     confidence = db.Column(db.Float, default=0.0)  # Confidence level 0-1
-    interference_type = db.Column(db.String(50))  # Type of interference detected
+    interference_type = db.Column(db.Enum(*INTERFERENCE_TYPES, name='iftype', native_enum=False))  # Type of interference detected
     detection_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 class UserSession(db.Model):
@@ -37,7 +48,7 @@ class UserSession(db.Model):
     session_id = db.Column(db.String(100), unique=True, nullable=False)
     user_ip = db.Column(db.String(45))
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
-    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     recordings_uploaded = db.Column(db.Integer, default=0)
     scistarter_logged = db.Column(db.Boolean, default=False)
     
@@ -54,7 +65,7 @@ class UserSession(db.Model):
 class ProcessingQueue(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     recording_id = db.Column(db.Integer, db.ForeignKey('recording.id'), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, processing, completed, failed
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, processing, completed, failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
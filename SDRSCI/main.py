@@ -1,4 +1,13 @@
-from app import app, socketio
-
+# The app is imported under the guard: analysis worker processes re-import this
+# module as __mp_main__ and must not build the app
 if __name__ == '__main__':
+    from app import app, db, socketio
+    
+    with app.app_context():
+        db.create_all()
+        from migrate_database import migrate_database
+        migrate_database()
+    if app.config.get('REALTIME_UPDATES', True):
+        from services.realtime_monitor import start_realtime_monitoring
+        start_realtime_monitoring()
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add new columns and indexes to an existing SQLite database
+"""
+import sqlite3
+import os
+
+# Columns added to existing tables since the initial schema: table -> [(column, type)]
+NEW_COLUMNS = {
+    'recordings': [
+        ('freq_low_hz', 'BIGINT'),
+        ('freq_high_hz', 'BIGINT'),
+        ('session_id', 'VARCHAR(64) REFERENCES user_sessions (session_id)'),
+    ],
+}
+
+# Indexes added since the initial schema: name -> (table, columns)
+NEW_INDEXES = {
+    'ix_user_sessions_last_activity': ('user_sessions', 'last_activity'),
+    'ix_recordings_processed': ('recordings', 'processed'),
+    'ix_recordings_freq_low_hz': ('recordings', 'freq_low_hz'),
+    'ix_recordings_freq_high_hz': ('recordings', 'freq_high_hz'),
+    'ix_recordings_session_id': ('recordings', 'session_id'),
+    'ix_rfi_rec_time': ('rfi_detections', 'recording_id, timestamp'),
+    'ix_rfi_rec_power_freq': ('rfi_detections', 'recording_id, power_level, frequency'),
+}
+
+# Unique indexes added since the initial schema; skipped while duplicate rows remain
+NEW_UNIQUE_INDEXES = {
+    'ix_recordings_filename': ('recordings', 'filename'),
+}
+
+def get_db_path():
+    """Resolve the SQLite file used by the app (Flask-SQLAlchemy keeps relative paths in instance/)"""
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///spectrum_sentinels.db')
+    if not uri.startswith('sqlite:///'):
+        return None
+    path = uri[len('sqlite:///'):]
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', path)
+
+def migrate_database():
+    """Add new columns and indexes to existing database"""
+    db_path = get_db_path()
+
+    if not db_path:
+        print("Not a SQLite database - run 'flask --app app init-db' instead")
+        return False
+
+    if not os.path.exists(db_path):
+        print("Database doesn't exist yet - will be created automatically")
+        return True
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        for table, columns in NEW_COLUMNS.items():
+            cursor.execute(f"PRAGMA table_info({table})")
+            existing = {row[1] for row in cursor.fetchall()}
+            for column, column_type in columns:
+                if column not in existing:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    print(f"✓ Added {table}.{column} column")
+
+        for index_name, (table, columns) in NEW_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+        for index_name, (table, columns) in NEW_UNIQUE_INDEXES.items():
+            try:
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+            except sqlite3.IntegrityError:
+                print(f"! Skipped {index_name}: duplicate {table}.{columns} values; "
+                      f"remove the duplicates and re-run (the file monitor checks for existing rows until then)")
+        print("✓ Indexes up to date")
+
+        conn.commit()
+        print("✓ Database migration completed successfully")
+
+    except Exception as e:
+        print(f"✗ Migration error: {str(e)}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+    return True
+
+if __name__ == '__main__':
+    migrate_database()
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session, object_session
 from app import db
 
 class UserSession(db.Model):
@@ -8,7 +10,7 @@ class UserSession(db.Model):
     session_id = db.Column(db.String(64), unique=True, nullable=False, index=True)
     user_ip = db.Column(db.String(45))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Age verification and consent
     age_verified = db.Column(db.Boolean, default=False)
@@ -30,7 +32,7 @@ class Recording(db.Model):
     __tablename__ = 'recordings'
     
     id = db.Column(db.Integer, primary_key=True)
-    filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, unique=True, index=True)
     original_filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     file_size = db.Column(db.BigInteger)
@@ -40,10 +42,12 @@ class Recording(db.Model):
     # Audio metadata
     sample_rate = db.Column(db.Integer)
     duration = db.Column(db.Float)
-    frequency_range = db.Column(db.String(100))
+    frequency_range = db.Column(db.String(100))  # As entered, kept for display
+    freq_low_hz = db.Column(db.BigInteger, index=True)  # Parsed from frequency_range at upload
+    freq_high_hz = db.Column(db.BigInteger, index=True)
     
     # Processing status
-    processed = db.Column(db.Boolean, default=False)
+    processed = db.Column(db.Boolean, default=False, index=True)
     rfi_detected = db.Column(db.Boolean, default=False)
     processing_started_at = db.Column(db.DateTime)
     processing_completed_at = db.Column(db.DateTime)
@@ -51,11 +55,19 @@ class Recording(db.Model):
     # Timestamps
     upload_timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Uploader, for locating detections; NULL for files picked up by the monitor
+    session_id = db.Column(db.String(64), db.ForeignKey('user_sessions.session_id'), index=True)
+    
     # Relationships
     detections = db.relationship('RFIDetection', backref='recording', lazy='dynamic', cascade='all, delete-orphan')
 
 class RFIDetection(db.Model):
     __tablename__ = 'rfi_detections'
+    __table_args__ = (
+        db.Index('ix_rfi_rec_time', 'recording_id', 'timestamp'),
+        # Covers the heatmap join + power filter without touching the table
+        db.Index('ix_rfi_rec_power_freq', 'recording_id', 'power_level', 'frequency'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     recording_id = db.Column(db.Integer, db.ForeignKey('recordings.id'), nullable=False, index=True)
@@ -70,6 +82,15 @@ class RFIDetection(db.Model):
     
     # Detection timestamp
     detected_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    @classmethod
+    def bulk_insert(cls, session, rows):
+        """Insert detection dicts with one executemany (multi-row VALUES pages) in the session's transaction"""
+        if not rows:
+            return
+        session.execute(insert(cls), rows)
+        # Bulk inserts skip the mapper events that mark cached results stale
+        session.info['data_changed'] = True
 
 class ProcessingQueue(db.Model):
     __tablename__ = 'processing_queue'
@@ -86,3 +107,27 @@ class ProcessingQueue(db.Model):
     
     # Relationship
     recording = db.relationship('Recording', backref='queue_items')
+
+# Incremented after each commit that touched recordings, detections or the processing
+# queue so that cached query results keyed on it are invalidated
+_data_version = 0
+
+def get_data_version():
+    """Return the current recording/detection/queue data version"""
+    return _data_version
+
+def _mark_data_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['data_changed'] = True
+
+def _bump_data_version(session):
+    global _data_version
+    if session.info.pop('data_changed', False):
+        _data_version += 1
+
+# Queue status is part of the broadcast stats (processing/pending counts)
+for _model in (Recording, RFIDetection, ProcessingQueue):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_data_changed)
+event.listen(Session, 'after_commit', _bump_data_version)
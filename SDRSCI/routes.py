@@ -1,63 +1,364 @@
 import os
+import re
+import hashlib
+import time
 import subprocess
 import logging
-from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify, session
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, g
 from flask_socketio import emit, join_room, leave_room
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, select, update
 import uuid
+import numpy as np
+
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import BaseTarget, ValueTarget
+except ImportError:  # Fall back to Werkzeug's multipart parser
+    StreamingFormDataParser = None
+
+try:
+    import orjson
+except ImportError:  # Fall back to Flask's JSON provider
+    orjson = None
 
 from app import app, db, socketio
-from models import Recording, RFIDetection, UserSession, ProcessingQueue
+from models import Recording, RFIDetection, UserSession, ProcessingQueue, get_data_version
 from services.rfi_detector import RFIDetector
 from services.scistarter_api import SciStarterAPI
 from services.file_processor import FileProcessor
-from services.realtime_monitor import start_realtime_monitoring
+from services.realtime_monitor import emit_batched
 
 # Initialize services
 rfi_detector = RFIDetector()
 scistarter = SciStarterAPI()
-file_processor = FileProcessor()
+file_processor = FileProcessor(
+    compression_level=app.config['COMPRESSION_LEVEL'],
+    compression_enabled=app.config['COMPRESSION_ENABLED']
+)
 
 # Allowed audio file extensions
 ALLOWED_EXTENSIONS = {'wav', 'flac', 'ogg', 'mp3', 'aiff', 'au', 'raw', 'iq', 'bin'}
 
+# Uploads are copied to disk in 1MB chunks so memory use stays flat for large files
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Werkzeug's form parser keeps file parts up to this size in memory and spools larger ones to a temp file
+SPOOLED_UPLOAD_MAX_SIZE = 500 * 1024
+
+# Matches user-entered ranges such as "144-146 MHz", "88 to 108MHz" or "1420 MHz"
+FREQUENCY_RANGE_PATTERN = re.compile(
+    r'^\s*([\d.]+)\s*(?:(?:-|–|to)\s*([\d.]+))?\s*([kmg]?hz)?\s*$', re.IGNORECASE
+)
+FREQUENCY_UNITS = {'hz': 1, 'khz': 1e3, 'mhz': 1e6, 'ghz': 1e9}
+
+# How stale UserSession.last_activity may get before a request refreshes it
+SESSION_ACTIVITY_INTERVAL = timedelta(seconds=60)
+
+# Seconds a cached /api/heatmap_data response may be reused while the time window slides
+HEATMAP_CACHE_TTL = 10
+
+# Seconds the homepage counters may lag behind processing queue changes
+INDEX_STATS_TTL = 5
+
+# Radio astronomy frequency bands (MHz)
+ASTRO_BANDS = {
+    'hi_line': (1420, 1421),  # Hydrogen line - most critical
+    'continuum_74': (73, 75),
+    'continuum_150': (149, 151), 
+    'continuum_325': (324, 326),
+    'continuum_1400': (1400, 1700),  # L-band
+    'continuum_4800': (4800, 5000),  # C-band
+    'seti': (1420, 1720),  # SETI frequencies
+    'protected_1610': (1610.6, 1613.8),  # Radio astronomy protected band
+    'protected_1660': (1660, 1670),  # Radio astronomy protected band
+    'protected_2690': (2690, 2700),  # Radio astronomy protected band
+}
+# Derived once at import for the heatmap query and band classification
+_ASTRO_NAMES = list(ASTRO_BANDS)
+_ASTRO_LOWS = np.array([low for low, high in ASTRO_BANDS.values()], dtype=np.float64)
+_ASTRO_HIGHS = np.array([high for low, high in ASTRO_BANDS.values()], dtype=np.float64)
+_ASTRO_BAND_FILTER = or_(*[
+    RFIDetection.frequency.between(low * 1e6, high * 1e6)
+    for low, high in ASTRO_BANDS.values()
+])
+_ASTRO_BAND_RANGES = {name: {'min': low, 'max': high} for name, (low, high) in ASTRO_BANDS.items()}
+
+def dumps_json(payload):
+    """Serialize an API payload to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return app.json.dumps(payload).encode('utf-8')
+
+def parse_frequency_range(text):
+    """Parse a frequency range string into (low_hz, high_hz); MHz is assumed without a unit"""
+    match = FREQUENCY_RANGE_PATTERN.match(text or '')
+    if not match:
+        return None, None
+    try:
+        low = float(match.group(1))
+        high = float(match.group(2)) if match.group(2) else low
+    except ValueError:
+        return None, None
+    scale = FREQUENCY_UNITS[(match.group(3) or 'mhz').lower()]
+    low_hz, high_hz = sorted((int(low * scale), int(high * scale)))
+    return low_hz, high_hz
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_upload_stream(file_storage, out):
+    """Stream an uploaded file into the binary file out without buffering it in memory"""
+    with out:
+        # Parts spooled to a temp file are copied kernel-side; fileno() on one still in
+        # memory would force it to disk, so those are copied through Python
+        if stream_size(file_storage.stream) > SPOOLED_UPLOAD_MAX_SIZE and copy_file_range(file_storage.stream, out):
+            return
+        while True:
+            chunk = file_storage.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+
+def stream_size(stream):
+    """Total size of a seekable stream, leaving its position unchanged"""
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+def copy_file_range(source, out):
+    """Copy the rest of source into out with os.copy_file_range; False if the kernel can't"""
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        source_fd = source.fileno()
+    except (AttributeError, OSError):
+        return False
+    
+    start = offset = source.tell()
+    remaining = os.fstat(source_fd).st_size - offset
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(source_fd, out.fileno(), remaining, offset)
+            if not copied:
+                break
+            offset += copied
+            remaining -= copied
+    except OSError:
+        # e.g. EXDEV across filesystems; rewind both sides for a userspace copy
+        source.seek(start)
+        out.seek(0)
+        out.truncate()
+        return False
+    return True
+
+def make_upload_filename(original_filename):
+    """Timestamped, filesystem-safe name for a stored upload; the random token keeps
+    same-named uploads within one second apart (Recording.filename is unique)"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
+    return f"{timestamp}{uuid.uuid4().hex[:8]}_{secure_filename(original_filename) or 'unknown_file'}"
+
+def create_upload_file(upload_folder, original_filename):
+    """Create a new stored upload file, never reusing an existing name; returns (filename, path, file)"""
+    while True:
+        filename = make_upload_filename(original_filename)
+        file_path = os.path.join(upload_folder, filename)
+        try:
+            return filename, file_path, open(file_path, 'xb')
+        except FileExistsError:
+            continue
+
+if StreamingFormDataParser is not None:
+    class UploadFileTarget(BaseTarget):
+        """Writes the multipart file part straight to the upload folder, skipping disallowed types"""
+        
+        def __init__(self, upload_folder):
+            super().__init__()
+            self.upload_folder = upload_folder
+            self.filename = None
+            self.file_path = None
+            self._file = None
+        
+        def on_start(self):
+            if not self.multipart_filename or not allowed_file(self.multipart_filename):
+                return
+            self.filename, self.file_path, self._file = create_upload_file(
+                self.upload_folder, self.multipart_filename
+            )
+        
+        def on_data_received(self, chunk):
+            if self._file:
+                self._file.write(chunk)
+        
+        def on_finish(self):
+            self.close()
+        
+        def close(self):
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def receive_upload():
+    """Read the upload form from the current request and store the file part on disk.
+    
+    Returns None when no file was sent, otherwise a dict with the original filename,
+    stored filename/path (None for disallowed file types) and the form fields.
+    """
+    upload_folder = app.config['UPLOAD_FOLDER']
+    
+    if StreamingFormDataParser is None:
+        file = request.files.get('file')
+        if not file or file.filename == '':
+            return None
+        upload = {
+            'original_filename': file.filename,
+            'filename': None,
+            'file_path': None,
+            'frequency_range': request.form.get('frequency_range', ''),
+            'sample_rate': request.form.get('sample_rate', '')
+        }
+        if allowed_file(file.filename):
+            upload['filename'], upload['file_path'], out = create_upload_file(upload_folder, file.filename)
+            save_upload_stream(file, out)
+        return upload
+    
+    # Parse the multipart body straight from the socket in large reads; MAX_CONTENT_LENGTH
+    # is enforced by request.stream
+    parser = StreamingFormDataParser(headers={'Content-Type': request.content_type})
+    file_target = UploadFileTarget(upload_folder)
+    frequency_range = ValueTarget()
+    sample_rate = ValueTarget()
+    parser.register('file', file_target)
+    parser.register('frequency_range', frequency_range)
+    parser.register('sample_rate', sample_rate)
+    
+    try:
+        while chunk := request.stream.read(UPLOAD_CHUNK_SIZE):
+            parser.data_received(chunk)
+    except Exception:
+        file_target.close()
+        if file_target.file_path and os.path.exists(file_target.file_path):
+            os.remove(file_target.file_path)
+        raise
+    
+    if not file_target.multipart_filename:
+        return None
+    return {
+        'original_filename': file_target.multipart_filename,
+        'filename': file_target.filename,
+        'file_path': file_target.file_path,
+        'frequency_range': frequency_range.value.decode('utf-8', 'replace'),
+        'sample_rate': sample_rate.value.decode('utf-8', 'replace')
+    }
+
+def request_now():
+    """Naive UTC time of the current request (whole seconds), computed once per request"""
+    if 'now' not in g:
+        g.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    return g.now
+
 def get_or_create_session():
-    if 'session_id' not in session:
+    """Return this visitor's UserSession, looked up at most once per request"""
+    if 'user_session' in g:
+        return g.user_session
+    
+    user_session = None
+    if 'session_id' in session:
+        user_session = UserSession.query.filter_by(session_id=session['session_id']).first()
+    else:
         session['session_id'] = str(uuid.uuid4())
+    
+    if user_session:
+        # Only write last_activity once a minute instead of on every request
+        now = request_now()
+        if not user_session.last_activity or now - user_session.last_activity > SESSION_ACTIVITY_INTERVAL:
+            db.session.execute(
+                update(UserSession).where(UserSession.id == user_session.id).values(last_activity=now)
+            )
+            db.session.commit()
+    else:
+        # New visitor, or session ID exists but no record found
         user_session = UserSession(
             session_id=session['session_id'],
             user_ip=request.remote_addr or '127.0.0.1'
         )
         db.session.add(user_session)
         db.session.commit()
-        return user_session
-    else:
-        user_session = UserSession.query.filter_by(session_id=session['session_id']).first()
-        if user_session:
-            user_session.last_activity = datetime.utcnow()
-            db.session.commit()
-            return user_session
-        else:
-            # Session ID exists but no record found, create new one
-            user_session = UserSession(
-                session_id=session['session_id'],
-                user_ip=request.remote_addr or '127.0.0.1'
-            )
-            db.session.add(user_session)
-            db.session.commit()
-            return user_session
+    
+    g.user_session = user_session
+    return user_session
 
 def check_age_verification():
     """Check if user has completed age verification"""
     user_session = get_or_create_session()
     return user_session.age_verified and user_session.consent_given
 
+def finish_upload_processing(recording_id, user_session_id=None):
+    """Compress an uploaded recording and start RFI detection off the request thread"""
+    with app.app_context():
+        try:
+            recording = db.session.get(Recording, recording_id)
+            if not recording:
+                return
+            
+            # Process file with compression
+            file_info = file_processor.process_upload(recording.file_path, recording.original_filename)
+            if not file_info:
+                queue_item = ProcessingQueue.query.filter_by(recording_id=recording_id).first()
+                if queue_item:
+                    queue_item.status = 'failed'
+                    queue_item.error_message = 'File processing failed'
+                    queue_item.completed_at = datetime.utcnow()
+                    db.session.commit()
+                socketio.emit('file_error', {
+                    'filename': recording.original_filename,
+                    'error': 'File processing failed'
+                })
+                return
+            
+            recording.file_path = file_info['file_path']
+            recording.compressed_size = file_info.get('compressed_size')
+            recording.compression_ratio = file_info.get('compression_ratio')
+            db.session.commit()
+            
+            # Emit real-time update
+            emit_batched('file_uploaded', {
+                'id': recording.id,
+                'filename': recording.original_filename,
+                'size': file_info['original_size'],
+                'compressed_size': file_info.get('compressed_size'),
+                'compression_ratio': file_info.get('compression_ratio'),
+                'timestamp': recording.upload_timestamp.isoformat()
+            })
+            
+            # Start RFI detection in background
+            try:
+                rfi_detector.process_recording_async(recording.id)
+            except Exception as e:
+                logging.error(f"RFI processing failed for recording {recording.id}: {str(e)}")
+            
+            # Log to SciStarter
+            try:
+                user_session = db.session.get(UserSession, user_session_id) if user_session_id else None
+                if user_session:
+                    scistarter.log_contribution(user_session.session_id, 'upload', {
+                        'filename': recording.original_filename,
+                        'file_size': file_info['original_size'],
+                        'compressed_size': file_info.get('compressed_size'),
+                        'compression_ratio': file_info.get('compression_ratio')
+                    })
+                    user_session.scistarter_logged = True
+                    db.session.commit()
+            except Exception as e:
+                logging.error(f"SciStarter logging failed: {str(e)}")
+                
+        except Exception as e:
+            logging.error(f"Upload post-processing failed for recording {recording_id}: {str(e)}")
+
 @app.route('/')
 def index():
     user_session = get_or_create_session()
@@ -67,10 +368,9 @@ def index():
         return redirect(url_for('verify_age'))
     
     # Get recent statistics
-    total_recordings = Recording.query.count()
-    total_rfi = RFIDetection.query.count()
-    recent_recordings = Recording.query.order_by(Recording.upload_timestamp.desc()).limit(5).all()
-    processing_count = ProcessingQueue.query.filter_by(status='processing').count()
+    total_recordings, total_rfi, processing_count, recent_recordings = _cached_index_stats(
+        get_data_version(), int(time.time() // INDEX_STATS_TTL)
+    )
     
     return render_template('index.html', 
                          total_recordings=total_recordings,
@@ -78,6 +378,31 @@ def index():
                          recent_recordings=recent_recordings,
                          processing_count=processing_count)
 
+@lru_cache(maxsize=4)
+def _cached_index_stats(data_version, time_bucket):
+    """Homepage counters and recent recordings; the arguments only participate in the cache key"""
+    total_recordings, total_rfi, processing_count = db.session.execute(select(
+        select(func.count(Recording.id)).scalar_subquery(),
+        select(func.count(RFIDetection.id)).scalar_subquery(),
+        select(func.count(ProcessingQueue.id)).where(ProcessingQueue.status == 'processing').scalar_subquery()
+    )).one()
+    
+    # Only the columns the recent activity feed renders
+    recent_recordings = db.session.execute(
+        select(
+            Recording.id,
+            Recording.original_filename,
+            Recording.file_size,
+            Recording.compressed_size,
+            Recording.compression_ratio,
+            Recording.upload_timestamp,
+            Recording.processed,
+            Recording.rfi_detected
+        ).order_by(Recording.upload_timestamp.desc()).limit(5)
+    ).all()
+    
+    return total_recordings, total_rfi, processing_count, recent_recordings
+
 @app.route('/upload', methods=['GET', 'POST'])
 def upload_file():
     user_session = get_or_create_session()
@@ -88,90 +413,46 @@ def upload_file():
     
     if request.method == 'POST':
         try:
-            # Check if file was uploaded
-            if 'file' not in request.files:
+            upload = receive_upload()
+            if not upload:
                 flash('No file selected', 'error')
                 return redirect(request.url)
             
-            file = request.files['file']
-            if file.filename == '':
-                flash('No file selected', 'error')
-                return redirect(request.url)
-            
-            if file and allowed_file(file.filename):
-                # Secure the filename
-                if file.filename:
-                    filename = secure_filename(file.filename)
-                else:
-                    filename = 'unknown_file'
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                filename = timestamp + filename
-                
-                # Save the file
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
+            if upload['file_path']:
+                filename = upload['filename']
+                file_path = upload['file_path']
                 
-                # Process file with compression
-                file_info = file_processor.process_upload(file_path, file.filename)
-                if not file_info:
-                    flash('File processing failed', 'error')
-                    return redirect(request.url)
-                
-                # Create database record
+                # Create database record; compression and detection run in the background
+                frequency_range = upload['frequency_range']
+                freq_low_hz, freq_high_hz = parse_frequency_range(frequency_range)
                 recording = Recording(
                     filename=filename,
-                    original_filename=file.filename,
+                    original_filename=upload['original_filename'],
                     file_path=file_path,
-                    file_size=file_info['original_size'],
-                    compressed_size=file_info.get('compressed_size'),
-                    compression_ratio=file_info.get('compression_ratio'),
-                    frequency_range=request.form.get('frequency_range', ''),
-                    sample_rate=int(request.form.get('sample_rate', 0)) if request.form.get('sample_rate') else None
+                    file_size=os.path.getsize(file_path),
+                    frequency_range=frequency_range,
+                    freq_low_hz=freq_low_hz,
+                    freq_high_hz=freq_high_hz,
+                    sample_rate=int(upload['sample_rate']) if upload['sample_rate'] else None,
+                    session_id=user_session.session_id if user_session else None
                 )
                 
                 db.session.add(recording)
-                db.session.commit()
                 
                 # Add to processing queue
-                queue_item = ProcessingQueue(recording_id=recording.id)
-                db.session.add(queue_item)
+                db.session.add(ProcessingQueue(recording=recording))
                 
                 # Update user session
                 if user_session:
                     user_session.recordings_uploaded += 1
                 db.session.commit()
                 
-                # Emit real-time update
-                socketio.emit('file_uploaded', {
-                    'id': recording.id,
-                    'filename': file.filename,
-                    'size': file_info['original_size'],
-                    'compressed_size': file_info.get('compressed_size'),
-                    'compression_ratio': file_info.get('compression_ratio'),
-                    'timestamp': recording.upload_timestamp.isoformat()
-                })
-                
-                # Start RFI detection in background
-                try:
-                    rfi_detector.process_recording_async(recording.id)
-                    flash('File uploaded successfully and queued for processing!', 'success')
-                except Exception as e:
-                    flash(f'File uploaded but processing failed: {str(e)}', 'warning')
-                    logging.error(f"RFI processing failed for recording {recording.id}: {str(e)}")
-                
-                # Log to SciStarter
-                try:
-                    if user_session:
-                        scistarter.log_contribution(user_session.session_id, 'upload', {
-                            'filename': file.filename,
-                            'file_size': file_info['original_size'],
-                            'compressed_size': file_info.get('compressed_size'),
-                            'compression_ratio': file_info.get('compression_ratio')
-                        })
-                        user_session.scistarter_logged = True
-                        db.session.commit()
-                except Exception as e:
-                    logging.error(f"SciStarter logging failed: {str(e)}")
+                socketio.start_background_task(
+                    finish_upload_processing,
+                    recording.id,
+                    user_session.id if user_session else None
+                )
+                flash('File uploaded successfully and queued for processing!', 'success')
                 
                 return redirect(url_for('results'))
             else:
@@ -216,169 +497,211 @@ def heatmap_data():
         freq_filter = request.args.get('freq_filter', 'all')
         astro_only = request.args.get('astro_only', 'false').lower() == 'true'
         
-        # Query RFI detections from the last N hours with location data
-        cutoff_time = datetime.utcnow().timestamp() - (hours * 3600)
-        
-        query = db.session.query(RFIDetection, Recording, UserSession).join(
-            Recording, RFIDetection.recording_id == Recording.id
-        ).outerjoin(
-            UserSession, UserSession.session_id == session.get('session_id')
-        ).filter(
-            Recording.upload_timestamp >= datetime.fromtimestamp(cutoff_time),
-            RFIDetection.power_level >= min_power
+        # Served from cache until recordings/detections change or the TTL bucket rolls over
+        body, etag = _cached_heatmap_json(
+            hours, min_power, freq_filter, astro_only,
+            get_data_version(), int(time.time() // HEATMAP_CACHE_TTL)
         )
         
-        # Radio astronomy frequency bands (MHz)
-        astro_bands = {
-            'hi_line': (1420, 1421),  # Hydrogen line - most critical
-            'continuum_74': (73, 75),
-            'continuum_150': (149, 151), 
-            'continuum_325': (324, 326),
-            'continuum_1400': (1400, 1700),  # L-band
-            'continuum_4800': (4800, 5000),  # C-band
-            'seti': (1420, 1720),  # SETI frequencies
-            'protected_1610': (1610.6, 1613.8),  # Radio astronomy protected band
-            'protected_1660': (1660, 1670),  # Radio astronomy protected band
-            'protected_2690': (2690, 2700),  # Radio astronomy protected band
-        }
+        # Polling clients that already hold this payload get an empty 304
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
         
-        # Apply frequency filtering
-        if freq_filter != 'all':
-            if freq_filter == 'radio_astronomy':
-                # Filter for radio astronomy bands
-                freq_conditions = []
-                for band_name, (min_freq, max_freq) in astro_bands.items():
-                    freq_conditions.append(
-                        and_(
-                            RFIDetection.frequency >= min_freq * 1e6,
-                            RFIDetection.frequency <= max_freq * 1e6
-                        )
-                    )
-                query = query.filter(or_(*freq_conditions))
-            elif freq_filter == 'vhf':
-                query = query.filter(
-                    RFIDetection.frequency >= 30e6,
-                    RFIDetection.frequency <= 300e6
-                )
-            elif freq_filter == 'uhf':
-                query = query.filter(
-                    RFIDetection.frequency >= 300e6,
-                    RFIDetection.frequency <= 1000e6
-                )
-            elif freq_filter == 'l_band':
-                query = query.filter(
-                    RFIDetection.frequency >= 1000e6,
-                    RFIDetection.frequency <= 2000e6
-                )
-            elif freq_filter == 'wifi':
-                query = query.filter(
-                    or_(
-                        and_(RFIDetection.frequency >= 2400e6, RFIDetection.frequency <= 2500e6),
-                        and_(RFIDetection.frequency >= 5150e6, RFIDetection.frequency <= 5850e6)
-                    )
+    except Exception as e:
+        logging.error(f"Heatmap data error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@lru_cache(maxsize=128)
+def _cached_heatmap_json(hours, min_power, freq_filter, astro_only, data_version, time_bucket):
+    """Encoded heatmap payload and its ETag; data_version and time_bucket only participate in the cache key"""
+    body = dumps_json(_build_heatmap_payload(hours, min_power, freq_filter, astro_only))
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def _build_heatmap_payload(hours, min_power, freq_filter, astro_only):
+    """Build the geographic heatmap payload for the given filters"""
+    # Query RFI detections from the last N hours with location data
+    cutoff = request_now() - timedelta(hours=hours)
+    
+    
+    # Project only the columns the payload uses so rows come back as plain mappings
+    query = select(
+        RFIDetection.id,
+        RFIDetection.recording_id,
+        RFIDetection.frequency,
+        RFIDetection.power_level,
+        RFIDetection.bandwidth,
+        RFIDetection.interference_type,
+        RFIDetection.confidence,
+        RFIDetection.detected_at,
+        Recording.upload_timestamp,
+        UserSession.id.label('user_session_id'),
+        UserSession.location_latitude,
+        UserSession.location_longitude,
+        UserSession.location_country,
+        UserSession.location_state,
+        UserSession.location_city
+    ).join(
+        Recording, RFIDetection.recording_id == Recording.id
+    ).outerjoin(
+        UserSession, UserSession.session_id == Recording.session_id
+    ).where(
+        Recording.upload_timestamp >= cutoff,
+        RFIDetection.power_level >= min_power
+    )
+    
+    if astro_only:
+        query = query.where(_ASTRO_BAND_FILTER)
+    
+    # Apply frequency filtering
+    if freq_filter != 'all':
+        if freq_filter == 'radio_astronomy':
+            # Filter for radio astronomy bands
+            query = query.where(_ASTRO_BAND_FILTER)
+        elif freq_filter == 'vhf':
+            query = query.where(
+                RFIDetection.frequency >= 30e6,
+                RFIDetection.frequency <= 300e6
+            )
+        elif freq_filter == 'uhf':
+            query = query.where(
+                RFIDetection.frequency >= 300e6,
+                RFIDetection.frequency <= 1000e6
+            )
+        elif freq_filter == 'l_band':
+            query = query.where(
+                RFIDetection.frequency >= 1000e6,
+                RFIDetection.frequency <= 2000e6
+            )
+        elif freq_filter == 'wifi':
+            query = query.where(
+                or_(
+                    and_(RFIDetection.frequency >= 2400e6, RFIDetection.frequency <= 2500e6),
+                    and_(RFIDetection.frequency >= 5150e6, RFIDetection.frequency <= 5850e6)
                 )
+            )
+    
+    # Execute query
+    results = db.session.execute(query).mappings().all()
+    
+    # Classify every detection against the radio astronomy bands in one pass.
+    # Bands overlap (hi_line sits inside continuum_1400 and seti), so take the
+    # first matching band in declaration order rather than bisecting on lows.
+    freq_mhz = np.fromiter((row['frequency'] for row in results), dtype=np.float64, count=len(results)) / 1e6
+    power = np.fromiter((row['power_level'] for row in results), dtype=np.float64, count=len(results))
+    in_band = (freq_mhz[:, None] >= _ASTRO_LOWS) & (freq_mhz[:, None] <= _ASTRO_HIGHS)
+    is_radio_astronomy = in_band.any(axis=1)
+    band_index = in_band.argmax(axis=1)
+    astro_bands = [_ASTRO_NAMES[index] if in_astro else None
+                   for index, in_astro in zip(band_index.tolist(), is_radio_astronomy.tolist())]
+    
+    # Format data for geographic heatmap
+    heatmap_data = []
+    default_locations = {
+        'latitude': 39.8283,  # Center of continental US
+        'longitude': -98.5795
+    }
+    
+    for row, frequency, in_astro, astro_band in zip(results, freq_mhz.tolist(), is_radio_astronomy.tolist(), astro_bands):
+        # Use user location if available, otherwise use default US center
+        latitude = default_locations['latitude']
+        longitude = default_locations['longitude']
+        location_source = 'default'
         
-        # Execute query
-        results = query.all()
-        
-        # Format data for geographic heatmap
-        heatmap_data = []
-        default_locations = {
-            'latitude': 39.8283,  # Center of continental US
-            'longitude': -98.5795
-        }
+        if row['location_latitude'] and row['location_longitude']:
+            latitude = row['location_latitude']
+            longitude = row['location_longitude']
+            location_source = 'user_provided'
         
-        for detection, recording, user_session in results:
-            # Use user location if available, otherwise use default US center
-            latitude = default_locations['latitude']
-            longitude = default_locations['longitude']
-            location_source = 'default'
-            
-            if user_session and user_session.location_latitude and user_session.location_longitude:
-                latitude = user_session.location_latitude
-                longitude = user_session.location_longitude
-                location_source = 'user_provided'
-            
-            # Check if frequency is in radio astronomy bands
-            freq_mhz = detection.frequency / 1e6
-            is_radio_astronomy = False
-            astro_band = None
-            
-            for band_name, (min_freq, max_freq) in astro_bands.items():
-                if min_freq <= freq_mhz <= max_freq:
-                    is_radio_astronomy = True
-                    astro_band = band_name
-                    break
-            
-            # Skip non-radio astronomy frequencies if astro_only filter is enabled
-            if astro_only and not is_radio_astronomy:
-                continue
-                
-            data_point = {
-                'id': detection.id,
-                'recording_id': recording.id,
-                'latitude': latitude,
-                'longitude': longitude,
-                'location_source': location_source,
-                'frequency': freq_mhz,
-                'power': detection.power_level,
-                'bandwidth': detection.bandwidth / 1e3 if detection.bandwidth else 1,
-                'type': detection.interference_type or 'unknown',
-                'confidence': detection.confidence,
-                'timestamp': detection.detected_at.isoformat(),
-                'upload_time': recording.upload_timestamp.isoformat(),
-                'is_radio_astronomy': is_radio_astronomy,
-                'astro_band': astro_band,
-                'location_info': {
-                    'country': user_session.location_country if user_session else 'USA',
-                    'state': user_session.location_state if user_session else None,
-                    'city': user_session.location_city if user_session else None
-                }
+        data_point = {
+            'id': row['id'],
+            'recording_id': row['recording_id'],
+            'latitude': latitude,
+            'longitude': longitude,
+            'location_source': location_source,
+            'frequency': frequency,
+            'power': row['power_level'],
+            'bandwidth': row['bandwidth'] / 1e3 if row['bandwidth'] else 1,
+            'type': row['interference_type'] or 'unknown',
+            'confidence': row['confidence'],
+            'timestamp': row['detected_at'].isoformat(),
+            'upload_time': row['upload_timestamp'].isoformat(),
+            'is_radio_astronomy': in_astro,
+            'astro_band': astro_band,
+            'location_info': {
+                'country': row['location_country'] if row['user_session_id'] else 'USA',
+                'state': row['location_state'],
+                'city': row['location_city']
             }
-            heatmap_data.append(data_point)
-        
-        # Summary statistics
-        total_detections = len(heatmap_data)
-        radio_astronomy_detections = sum(1 for d in heatmap_data if d['is_radio_astronomy'])
-        unique_bands = len(set(d['astro_band'] for d in heatmap_data if d['astro_band']))
-        avg_power = sum(d['power'] for d in heatmap_data) / total_detections if total_detections > 0 else 0
-        
-        return jsonify({
-            'success': True,
-            'data': heatmap_data,
-            'summary': {
-                'total_detections': total_detections,
-                'radio_astronomy_detections': radio_astronomy_detections,
-                'interference_detections': total_detections - radio_astronomy_detections,
-                'unique_astro_bands': unique_bands,
-                'average_power': round(avg_power, 2),
-                'time_range_hours': hours
-            },
-            'radio_astronomy_bands': {k: {'min': v[0], 'max': v[1]} for k, v in astro_bands.items()}
-        })
-        
-    except Exception as e:
-        logging.error(f"Heatmap data error: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        }
+        heatmap_data.append(data_point)
+    
+    # Summary statistics
+    total_detections = len(heatmap_data)
+    radio_astronomy_detections = int(is_radio_astronomy.sum())
+    unique_bands = len(np.unique(band_index[is_radio_astronomy]))
+    avg_power = float(power.mean()) if total_detections > 0 else 0
+    
+    return {
+        'success': True,
+        'data': heatmap_data,
+        'summary': {
+            'total_detections': total_detections,
+            'radio_astronomy_detections': radio_astronomy_detections,
+            'interference_detections': total_detections - radio_astronomy_detections,
+            'unique_astro_bands': unique_bands,
+            'average_power': round(avg_power, 2),
+            'time_range_hours': hours
+        },
+        'radio_astronomy_bands': _ASTRO_BAND_RANGES
+    }
 
 @app.route('/api/recording/<int:recording_id>')
 def recording_details(recording_id):
     try:
-        recording = Recording.query.get_or_404(recording_id)
-        detections = RFIDetection.query.filter_by(recording_id=recording_id).all()
+        recording = db.session.execute(
+            select(
+                Recording.id,
+                Recording.original_filename,
+                Recording.upload_timestamp,
+                Recording.file_size,
+                Recording.compressed_size,
+                Recording.compression_ratio,
+                Recording.sample_rate,
+                Recording.duration,
+                Recording.frequency_range,
+                Recording.processed,
+                Recording.rfi_detected
+            ).where(Recording.id == recording_id)
+        ).first()
+        if recording is None:
+            return jsonify({'success': False, 'error': 'Recording not found'}), 404
         
-        detection_data = []
-        for d in detections:
-            detection_data.append({
-                'timestamp': d.timestamp,
-                'frequency': d.frequency,
-                'power_level': d.power_level,
-                'bandwidth': d.bandwidth,
-                'confidence': d.confidence,
-                'type': d.interference_type
-            })
+        detections = db.session.execute(
+            select(
+                RFIDetection.timestamp,
+                RFIDetection.frequency,
+                RFIDetection.power_level,
+                RFIDetection.bandwidth,
+                RFIDetection.confidence,
+                RFIDetection.interference_type
+            ).where(RFIDetection.recording_id == recording_id)
+        ).all()
         
-        return jsonify({
+        detection_data = [{
+            'timestamp': timestamp,
+            'frequency': frequency,
+            'power_level': power_level,
+            'bandwidth': bandwidth,
+            'confidence': confidence,
+            'type': interference_type
+        } for timestamp, frequency, power_level, bandwidth, confidence, interference_type in detections]
+        
+        body = dumps_json({
             'success': True,
             'recording': {
                 'id': recording.id,
@@ -395,6 +718,7 @@ def recording_details(recording_id):
             },
             'detections': detection_data
         })
+        return app.response_class(body, mimetype='application/json')
         
     except Exception as e:
         logging.error(f"Recording details error: {str(e)}")
@@ -412,30 +736,25 @@ def launch_sdr():
         audio_dir = app.config['AUDIO_DIRECTORY']
         
         # Auto-configure SDR Sharp before launching
-        from services.sdr_sharp_config import configure_sdr_sharp
+        from services.sdr_sharp_config import configure_sdr_sharp, find_sdr_sharp_executable
         config_success = configure_sdr_sharp(sdr_dir, audio_dir)
         
         if config_success:
             flash('SDR Sharp auto-configured for optimal RFI detection!', 'info')
         
-        # Look for common SDR Sharp executables in the directory
-        possible_exes = [
-            'SDRSharp.dotnet8.exe',
-            'SDRSharp.exe', 
-            'sdrsharp.exe'
-        ]
-        
-        sdr_exe = None
-        if os.path.exists(sdr_dir):
-            for exe in possible_exes:
-                exe_path = os.path.join(sdr_dir, exe)
-                if os.path.exists(exe_path):
-                    sdr_exe = exe_path
-                    break
+        # Resolved once at startup; rescan only if the executable has moved since
+        sdr_exe = app.config.get('SDR_SHARP_EXE') or find_sdr_sharp_executable(sdr_dir)
+        app.config['SDR_SHARP_EXE'] = sdr_exe
         
         if sdr_exe:
             # Launch SDR Sharp
-            subprocess.Popen([sdr_exe], cwd=sdr_dir)
+            try:
+                subprocess.Popen([sdr_exe], cwd=sdr_dir)
+            except FileNotFoundError:
+                sdr_exe = app.config['SDR_SHARP_EXE'] = find_sdr_sharp_executable(sdr_dir)
+                if not sdr_exe:
+                    raise
+                subprocess.Popen([sdr_exe], cwd=sdr_dir)
             flash('SDR Sharp launched with RFI detection settings!', 'success')
         else:
             logging.error(f"SDR Sharp executable not found in: {sdr_dir}")
@@ -465,7 +784,7 @@ def verify_age():
             # Update user session with verification data
             user_session.age_verified = True
             user_session.consent_given = True
-            user_session.consent_timestamp = datetime.utcnow()
+            user_session.consent_timestamp = request_now()
             
             # Location data
             user_session.location_country = request.form.get('country', '').strip()
@@ -531,6 +850,15 @@ def handle_leave_room(data):
     leave_room(room)
     emit('left_room', {'room': room})
 
-# Start real-time monitoring when the app starts
-if app.config.get('REALTIME_UPDATES', True):
+# Real-time monitoring starts with the first request rather than at import, so importing
+# the app (CLI commands, tests, WSGI workers that never serve) doesn't spawn threads
+_realtime_started = False
+
+@app.before_request
+def ensure_realtime_monitoring():
+    global _realtime_started
+    if _realtime_started or not app.config.get('REALTIME_UPDATES', True):
+        return
+    from services.realtime_monitor import start_realtime_monitoring
     start_realtime_monitoring()
+    _realtime_started = True
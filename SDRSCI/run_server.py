@@ -7,8 +7,9 @@ Enhanced with real-time monitoring and file compression
 import os
 import sys
 import logging
-from waitress import serve
-from app import app, socketio
+
+# The app is imported inside the functions that use it: analysis worker processes
+# re-import this module as __mp_main__ and must not build the app
 
 def setup_logging():
     """Configure application logging"""
@@ -30,6 +31,7 @@ def setup_logging():
 
 def validate_environment():
     """Validate required environment variables and directories"""
+    from app import app, db
     logger = logging.getLogger(__name__)
     
     # Check required directories
@@ -47,19 +49,25 @@ def validate_environment():
                 logger.error(f"Failed to create directory {directory}: {e}")
                 return False
     
-    # Test database connection
+    # Create missing tables and test database connection
     try:
         with app.app_context():
+            db.create_all()
+            from migrate_database import migrate_database
+            migrate_database()
             from models import Recording
             count = Recording.query.count()
             logger.info(f"Database connection successful. Total recordings: {count}")
+            logger.info(f"Connection pool: {db.engine.pool.status()}")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         logger.warning("Server will start but database functionality may not work")
     
-    # Check SDR Sharp path (optional)
+    # Check SDR Sharp path (optional) and remember the executable for /launch_sdr
+    from services.sdr_sharp_config import find_sdr_sharp_executable
     sdr_path = app.config.get('SDR_SHARP_PATH')
-    if sdr_path and not os.path.exists(sdr_path):
+    app.config['SDR_SHARP_EXE'] = find_sdr_sharp_executable(sdr_path) if sdr_path else None
+    if sdr_path and not app.config['SDR_SHARP_EXE']:
         logger.warning(f"SDR Sharp not found at: {sdr_path}")
         logger.warning("SDR Sharp launch functionality will not work")
     
@@ -67,6 +75,7 @@ def validate_environment():
 
 def print_startup_info():
     """Print startup information"""
+    from app import app
     logger = logging.getLogger(__name__)
     
     logger.info("=" * 60)
@@ -91,8 +100,36 @@ def print_startup_info():
     
     logger.info("=" * 60)
 
+def run_gunicorn(host, port):
+    """Replace this process with gunicorn using gevent WebSocket workers"""
+    logger = logging.getLogger(__name__)
+    
+    # Idle Socket.IO connections are parked on greenlets instead of holding
+    # one of Waitress's request threads each
+    workers = int(os.environ.get('WORKERS', 1))
+    if workers > 1 and not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        logger.warning("WORKERS > 1 needs SOCKETIO_MESSAGE_QUEUE and sticky sessions; using 1 worker")
+        workers = 1
+    
+    # Workers import the app after gevent has patched the stdlib, so Socket.IO
+    # has to be told to use gevent rather than threads
+    os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+    
+    logger.info(f"Running in PRODUCTION mode with gunicorn ({workers} gevent worker(s))")
+    # Real-time monitoring starts in the worker on its first request
+    os.execvp(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--worker-class', 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+        '--workers', str(workers),
+        '--worker-connections', os.environ.get('WORKER_CONNECTIONS', '1000'),
+        '--bind', f"{host}:{port}",
+        '--timeout', '120',
+        'app:app'
+    ])
+
 def main():
     """Main server entry point"""
+    from app import app, socketio
     setup_logging()
     logger = logging.getLogger(__name__)
     
@@ -108,6 +145,15 @@ def main():
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
     threads = int(os.environ.get('THREADS', 4))
+    server = os.environ.get('SERVER', 'waitress').lower()
+    
+    if server == 'gunicorn' and not debug:
+        run_gunicorn(host, port)
+    
+    # Start file monitoring up front so recordings are picked up before the first request
+    if app.config.get('REALTIME_UPDATES', True):
+        from services.realtime_monitor import start_realtime_monitoring
+        start_realtime_monitoring()
     
     logger.info("Starting NRAO Spectrum Sentinels server...")
     logger.info("Press Ctrl+C to stop the server")
@@ -127,6 +173,7 @@ def main():
         else:
             # Production mode with Waitress
             logger.info("Running in PRODUCTION mode with Waitress WSGI server")
+            from waitress import serve
             serve(
                 app,
                 host=host,
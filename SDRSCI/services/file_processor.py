@@ -1,41 +1,167 @@
 import os
-import gzip
+import time
 import shutil
+import zlib
+import struct
 import logging
 from datetime import datetime
-from pathlib import Path
+from functools import lru_cache
+
+try:
+    # ISA-L's gzip is a drop-in replacement with much faster deflate/inflate; it tops out at level 3
+    from isal import igzip as gzip
+    from isal import isal_zlib as deflate
+    from isal.isal_zlib import ISAL_BEST_COMPRESSION as MAX_COMPRESSION_LEVEL
+except ImportError:  # Fall back to the standard library's zlib-based gzip
+    import gzip
+    deflate = zlib
+    MAX_COMPRESSION_LEVEL = 9
+
+try:
+    # Deflates independent blocks on a thread pool; the output is ordinary multi-member gzip
+    import mgzip
+except ImportError:
+    mgzip = None
+
+# Compressed recordings are stored as <name>.<ext>.gz next to where the original was
+COMPRESSED_SUFFIX = '.gz'
+
+# wbits selecting a gzip header and trailer (CRC-32 computed inside deflate)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Read/write size for compression: fewer syscalls and larger deflate calls than the 16KB default
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Files at least this large are compressed in PARALLEL_COMPRESSION_BLOCK_SIZE blocks on every core
+PARALLEL_COMPRESSION_MIN_SIZE = 64 * 1024 * 1024
+PARALLEL_COMPRESSION_BLOCK_SIZE = 8 * 1024 * 1024
+
+SUPPORTED_FORMATS = frozenset({
+    '.wav', '.flac', '.ogg', '.mp3', '.aiff', '.au',
+    '.raw', '.iq', '.bin', '.dat'
+})
+COMPRESSED_FORMATS = frozenset({'.flac', '.ogg', '.mp3'})
+
+# Whether a supported format is worth gzipping at all; codecs like FLAC are already compressed
+COMPRESS_POLICY = {ext: ext not in COMPRESSED_FORMATS for ext in SUPPORTED_FORMATS}
+MIN_COMPRESS_SIZE = 1024 * 1024
+
+# SDR sample captures are close to noise; extra deflate effort buys almost no ratio
+FORMAT_COMPRESSION_LEVELS = {'.raw': 1, '.iq': 1, '.bin': 1, '.dat': 1}
+
+# Files whose first 128KB don't deflate below this ratio at level 1 are stored as-is
+PROBE_SAMPLE_SIZE = 128 * 1024
+MAX_PROBE_RATIO = 0.92
+
+# Signatures of already-compressed payloads, whatever the file extension says
+COMPRESSED_SIGNATURES = (b'fLaC', b'OggS', b'ID3')
+PCM_WAVE_FORMATS = {0x0001, 0x0003, 0xFFFE}  # PCM, IEEE float, extensible
+
+def open_recording(file_path):
+    """Open a stored recording for binary reading, decompressing .gz archives on the fly"""
+    if file_path.endswith(COMPRESSED_SUFFIX):
+        return gzip.open(file_path, 'rb')
+    return open(file_path, 'rb')
+
+def file_extension(file_name):
+    """Lower-cased extension of a file name or path ('' if none), without building a Path"""
+    return os.path.splitext(file_name)[1].lower()
+
+def recording_format(file_path):
+    """Audio format extension of a stored recording, ignoring any .gz archive suffix"""
+    if file_path.endswith(COMPRESSED_SUFFIX):
+        file_path = file_path[:-len(COMPRESSED_SUFFIX)]
+    return file_extension(file_path)
+
+def _write_gzip(f_in, f_out, compression_level, file_size):
+    """Write f_in to f_out as gzip, using mgzip's parallel deflate for large files when installed"""
+    if mgzip is not None and file_size >= PARALLEL_COMPRESSION_MIN_SIZE:
+        with mgzip.MultiGzipFile(fileobj=f_out, mode='wb', compresslevel=compression_level,
+                                 thread=os.cpu_count() or 1, blocksize=PARALLEL_COMPRESSION_BLOCK_SIZE) as gz_out:
+            shutil.copyfileobj(f_in, gz_out, length=COPY_BUFFER_SIZE)
+        return
+    
+    # A bare compressobj skips GzipFile's separate CRC pass and buffering layer
+    compressor = deflate.compressobj(min(compression_level, MAX_COMPRESSION_LEVEL), deflate.DEFLATED, GZIP_WBITS)
+    while chunk := f_in.read(COPY_BUFFER_SIZE):
+        f_out.write(compressor.compress(chunk))
+    f_out.write(compressor.flush())
+
+def read_wav_header(file_path):
+    """Read sample rate, channels and duration from the WAV chunk headers without loading samples"""
+    with open_recording(file_path) as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError("Not a RIFF/WAVE file")
+        
+        header = {}
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError("WAV file has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size + chunk_size % 2)
+                _, channels, sample_rate, byte_rate = struct.unpack_from('<HHII', fmt)
+                header = {'sample_rate': sample_rate, 'channels': channels}
+            elif chunk_id == b'data':
+                if not header:
+                    raise ValueError("WAV data chunk precedes fmt chunk")
+                header['duration'] = chunk_size / byte_rate
+                return header
+            else:
+                # Chunks are word-aligned
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+@lru_cache(maxsize=4096)
+def _file_metadata(file_path, mtime_ns, size):
+    """Metadata for one version of a file; mtime_ns and size make rewritten files miss the cache"""
+    metadata = {
+        'size': size,
+        'modified': datetime.fromtimestamp(mtime_ns / 1e9),
+        'format': recording_format(file_path)
+    }
+    
+    # Try to get audio-specific metadata
+    try:
+        if metadata['format'] == '.wav':
+            metadata.update(read_wav_header(file_path))
+    except (OSError, struct.error, ValueError, ZeroDivisionError):
+        pass
+    
+    return metadata
 
 class FileProcessor:
     """Enhanced file processing with compression and optimization"""
     
-    def __init__(self, compression_level=6):
+    def __init__(self, compression_level=6, compression_enabled=True):
         self.compression_level = compression_level
-        self.supported_formats = {
-            '.wav', '.flac', '.ogg', '.mp3', '.aiff', '.au', 
-            '.raw', '.iq', '.bin', '.dat'
-        }
+        self.compression_enabled = compression_enabled
+        self.supported_formats = SUPPORTED_FORMATS
     
     def process_upload(self, file_path, original_filename):
         """Process uploaded file with compression and optimization"""
         try:
             file_info = {
+                'file_path': file_path,
                 'original_size': os.path.getsize(file_path),
                 'compressed_size': None,
                 'compression_ratio': None,
                 'processing_time': None
             }
             
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
             
             # Determine if file should be compressed
-            file_ext = Path(original_filename).suffix.lower()
+            file_ext = file_extension(original_filename)
             
-            if self._should_compress_file(file_ext, file_info['original_size']):
-                compressed_path = self._compress_file(file_path)
+            if self.compression_enabled and self._should_compress_file(file_path, file_ext, file_info['original_size']):
+                compressed_path = self._compress_file(file_path, file_ext, file_info['original_size'])
                 if compressed_path:
-                    # Replace original with compressed version
-                    shutil.move(compressed_path, file_path)
-                    file_info['compressed_size'] = os.path.getsize(file_path)
+                    # The .gz archive replaces the original; callers store the new path
+                    file_info['file_path'] = compressed_path
+                    file_info['compressed_size'] = os.path.getsize(compressed_path)
                     file_info['compression_ratio'] = file_info['compressed_size'] / file_info['original_size']
                     logging.info(f"File compressed: {original_filename}, ratio: {file_info['compression_ratio']:.2f}")
                 else:
@@ -46,7 +172,7 @@ class FileProcessor:
                 file_info['compression_ratio'] = 1.0
             
             # Calculate processing time
-            file_info['processing_time'] = (datetime.now() - start_time).total_seconds()
+            file_info['processing_time'] = (time.perf_counter_ns() - start_ns) / 1e9
             
             return file_info
             
@@ -54,66 +180,57 @@ class FileProcessor:
             logging.error(f"File processing failed for {original_filename}: {str(e)}")
             return None
     
-    def _should_compress_file(self, file_ext, file_size):
+    def _should_compress_file(self, file_path, file_ext, file_size):
         """Determine if a file should be compressed"""
-        # Don't compress already compressed formats
-        compressed_formats = {'.flac', '.ogg', '.mp3'}
-        if file_ext in compressed_formats:
+        # Only uncompressed supported formats of at least 1MB
+        if file_size < MIN_COMPRESS_SIZE or not COMPRESS_POLICY.get(file_ext, False):
+            return False
+        
+        # Skip noise-like or already-compressed data that deflate can't shrink
+        return self._probe_compressibility(file_path)
+    
+    def _probe_compressibility(self, file_path):
+        """Check whether the start of a file is worth compressing"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(PROBE_SAMPLE_SIZE)
+        if not sample:
             return False
         
-        # Only compress files larger than 1MB
-        if file_size < 1024 * 1024:
+        if sample.startswith(COMPRESSED_SIGNATURES) or sample[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
             return False
+        if sample[:4] == b'RIFF' and sample[8:16] == b'WAVEfmt ' and len(sample) >= 22:
+            format_tag, = struct.unpack_from('<H', sample, 20)
+            if format_tag not in PCM_WAVE_FORMATS:
+                return False
         
-        # Compress supported audio formats
-        return file_ext in self.supported_formats
+        return len(zlib.compress(sample, 1)) / len(sample) <= MAX_PROBE_RATIO
     
-    def _compress_file(self, file_path):
-        """Compress file using gzip"""
+    def _compress_file(self, file_path, file_ext, file_size):
+        """Replace file_path with a gzip archive of it and return the archive's path"""
+        compression_level = FORMAT_COMPRESSION_LEVELS.get(file_ext, self.compression_level)
+        compressed_path = file_path + COMPRESSED_SUFFIX
+        temp_path = compressed_path + '.tmp'
         try:
-            compressed_path = file_path + '.tmp.gz'
-            
-            with open(file_path, 'rb') as f_in:
-                with gzip.open(compressed_path, 'wb', compresslevel=self.compression_level) as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            
-            # Decompress back to original format for processing
-            decompressed_path = file_path + '.tmp'
-            with gzip.open(compressed_path, 'rb') as f_in:
-                with open(decompressed_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            with open(file_path, 'rb') as f_in, open(temp_path, 'wb', buffering=COPY_BUFFER_SIZE) as f_out:
+                _write_gzip(f_in, f_out, compression_level, file_size)
             
-            # Clean up
-            os.remove(compressed_path)
+            os.replace(temp_path, compressed_path)
+            os.remove(file_path)
             
-            return decompressed_path
+            return compressed_path
             
         except Exception as e:
             logging.error(f"File compression failed: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
             return None
     
     def get_file_metadata(self, file_path):
         """Extract metadata from audio files"""
         try:
-            metadata = {
-                'size': os.path.getsize(file_path),
-                'modified': datetime.fromtimestamp(os.path.getmtime(file_path)),
-                'format': Path(file_path).suffix.lower()
-            }
-            
-            # Try to get audio-specific metadata
-            try:
-                import scipy.io.wavfile
-                if metadata['format'] == '.wav':
-                    sample_rate, audio_data = scipy.io.wavfile.read(file_path)
-                    metadata['sample_rate'] = sample_rate
-                    metadata['duration'] = len(audio_data) / sample_rate
-                    metadata['channels'] = 1 if len(audio_data.shape) == 1 else audio_data.shape[1]
-            except:
-                pass
-            
-            return metadata
-            
+            stat = os.stat(file_path)
+            # Copy so callers can't modify the cached entry
+            return dict(_file_metadata(file_path, stat.st_mtime_ns, stat.st_size))
         except Exception as e:
             logging.error(f"Metadata extraction failed: {str(e)}")
             return {}
@@ -1,33 +1,155 @@
 import os
 import time
+import queue
 import threading
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import FileSystemEventHandler
 from flask_socketio import emit
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
 from app import app, db, socketio
-from models import Recording, ProcessingQueue
-from services.file_processor import FileProcessor
+from models import Recording, RFIDetection, ProcessingQueue, get_data_version
+from services.file_processor import FileProcessor, file_extension
 from services.rfi_detector import RFIDetector
 
+# Extensions the monitor picks up
+AUDIO_EXTENSIONS = frozenset({'.wav', '.flac', '.ogg', '.mp3', '.aiff', '.au', '.raw', '.iq', '.bin'})
+
+# Filesystems where native change notifications miss writes from other hosts
+NETWORK_FILESYSTEMS = frozenset({'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'afs', 'ceph', 'glusterfs', 'lustre'})
+POLLING_INTERVAL = 5  # seconds
+
+# Upper bound on remembered (inode, mtime) pairs before the set is reset
+SEEN_FILES_LIMIT = 4096
+
+# A file is processed once it has had no events for FILE_SETTLE_DELAY seconds
+# and its size holds steady over FILE_STABLE_INTERVAL
+FILE_SETTLE_DELAY = 2.0
+FILE_STABLE_INTERVAL = 0.5
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING; others fall back to a lookup first
+UPSERT_CONSTRUCTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def has_unique_filename_index(engine):
+    """Whether recordings.filename is unique, as ON CONFLICT (filename) requires; the
+    migration leaves the index out while duplicate filenames remain"""
+    inspector = inspect(engine)
+    unique_columns = [index['column_names'] for index in inspector.get_indexes('recordings') if index['unique']]
+    unique_columns += [constraint['column_names'] for constraint in inspector.get_unique_constraints('recordings')]
+    return ['filename'] in unique_columns
+
+# Seconds broadcaster stats and activity may be reused while the data is unchanged
+BROADCAST_CACHE_TTL = 4.5
+
+# The broadcaster pushes after database commits, at most once per BROADCAST_MIN_INTERVAL,
+# and every BROADCAST_HEARTBEAT seconds when nothing changes
+BROADCAST_MIN_INTERVAL = 1.0
+BROADCAST_HEARTBEAT = 30
+
+# Settled files are processed on a shared pool; beyond MAX_FILE_BACKLOG queued
+# files new arrivals are dropped (and logged) rather than piling up threads
+MAX_FILE_BACKLOG = 1024
+file_workers = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='file-monitor')
+
+# Recordings picked up by the monitor wait here for one of RFI_QUEUE_WORKERS threads,
+# one per analysis process so the pool stays busy without spawning a thread per file
+RFI_QUEUE_SIZE = 512
+RFI_QUEUE_WORKERS = int(os.environ.get('RFI_WORKER_PROCESSES', 2))
+rfi_queue = queue.Queue(maxsize=RFI_QUEUE_SIZE)
+
+def _rfi_worker():
+    """Run queued recordings through RFI detection one at a time"""
+    # One detector per worker thread; detectors keep no per-recording state
+    rfi_detector = RFIDetector()
+    while True:
+        recording_id = rfi_queue.get()
+        try:
+            rfi_detector.process_recording(recording_id)
+        except Exception:
+            # Keep the worker alive for the rest of the queue
+            logging.exception(f"RFI worker failed on recording {recording_id}")
+        finally:
+            rfi_queue.task_done()
+
 class RealtimeFileMonitor(FileSystemEventHandler):
     """Monitor directory for new audio files and process them in real-time"""
     
     def __init__(self):
-        self.file_processor = FileProcessor()
-        self.rfi_detector = RFIDetector()
+        self.file_processor = FileProcessor(
+            compression_level=app.config['COMPRESSION_LEVEL'],
+            compression_enabled=app.config['COMPRESSION_ENABLED']
+        )
         self.processing_lock = threading.Lock()
+        # (inode, mtime_ns) of files already handled, so repeat events skip the DB lookup
+        self.seen_files = set()
+        # Settle timers per path; each new event for a path restarts its timer
+        self.pending_timers = {}
+        self.backlog = 0
+        # INSERT ... ON CONFLICT construct for claiming filenames, or None to look them up
+        # first; decided once here, after startup has run the migration
+        with app.app_context():
+            insert_recording = UPSERT_CONSTRUCTS.get(db.engine.dialect.name)
+            if insert_recording is not None and not has_unique_filename_index(db.engine):
+                logging.info("recordings.filename has no unique index; checking for existing recordings before inserting")
+                insert_recording = None
+        self.insert_recording = insert_recording
         
     def on_created(self, event):
         if not event.is_directory:
-            self._process_new_file(event.src_path)
+            self._schedule_file(event.src_path)
     
     def on_modified(self, event):
         if not event.is_directory:
-            # Wait a bit to ensure file is completely written
-            time.sleep(2)
-            self._process_new_file(event.src_path)
+            self._schedule_file(event.src_path)
+    
+    def _schedule_file(self, file_path):
+        """Coalesce a burst of write events on a file into one processing run"""
+        if not self._is_audio_file(file_path):
+            return
+        
+        timer = threading.Timer(FILE_SETTLE_DELAY, self._enqueue_file, args=(file_path,))
+        timer.daemon = True
+        with self.processing_lock:
+            previous = self.pending_timers.get(file_path)
+            if previous:
+                previous.cancel()
+            self.pending_timers[file_path] = timer
+        timer.start()
+    
+    def _enqueue_file(self, file_path):
+        """Hand a file whose events have settled to the worker pool"""
+        with self.processing_lock:
+            if self.pending_timers.get(file_path) is threading.current_thread():
+                del self.pending_timers[file_path]
+            if self.backlog >= MAX_FILE_BACKLOG:
+                logging.warning(f"File processing backlog full, dropping: {file_path}")
+                return
+            self.backlog += 1
+        file_workers.submit(self._process_settled_file, file_path)
+    
+    def _process_settled_file(self, file_path):
+        """Process a file once writes have stopped, rescheduling it if it is still growing"""
+        try:
+            size = os.path.getsize(file_path)
+            time.sleep(FILE_STABLE_INTERVAL)
+            if os.path.getsize(file_path) != size:
+                self._schedule_file(file_path)
+                return
+            
+            self._process_new_file(file_path)
+        except FileNotFoundError:
+            return
+        finally:
+            with self.processing_lock:
+                self.backlog -= 1
     
     def _process_new_file(self, file_path):
         """Process a newly detected file"""
@@ -35,12 +157,59 @@ class RealtimeFileMonitor(FileSystemEventHandler):
             if not self._is_audio_file(file_path):
                 return
             
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # Already moved away, e.g. replaced by its compressed archive
+                return
+            file_key = (stat.st_ino, stat.st_mtime_ns)
+            with self.processing_lock:
+                if file_key in self.seen_files:
+                    return
+                if len(self.seen_files) >= SEEN_FILES_LIMIT:
+                    self.seen_files.clear()
+                self.seen_files.add(file_key)
+            
             with app.app_context():
-                # Check if file already exists in database
                 filename = os.path.basename(file_path)
-                existing = Recording.query.filter_by(filename=filename).first()
-                if existing:
-                    return
+                
+                # Claim the filename before touching the file: compressing replaces <name>.gz,
+                # which belongs to the existing recording if the name is already taken
+                values = dict(
+                    filename=filename,
+                    original_filename=filename,
+                    file_path=file_path,
+                    file_size=stat.st_size
+                )
+                insert_recording = self.insert_recording
+                if insert_recording is not None:
+                    # The unique filename index settles races between events for the same file
+                    try:
+                        claimed = db.session.execute(
+                            insert_recording(Recording).values(**values)
+                            .on_conflict_do_nothing(index_elements=['filename'])
+                            .returning(Recording.id)
+                        ).first()
+                    except (OperationalError, ProgrammingError):
+                        # The unique index was dropped since startup
+                        db.session.rollback()
+                        logging.warning("recordings.filename is no longer unique; checking for existing recordings before inserting")
+                        self.insert_recording = insert_recording = None
+                    else:
+                        if claimed is None:
+                            db.session.rollback()
+                            return
+                        recording_id = claimed.id
+                        # Core inserts skip the mapper events that bump the data version
+                        db.session.info['data_changed'] = True
+                if insert_recording is None:
+                    if Recording.query.filter_by(filename=filename).first():
+                        return
+                    recording = Recording(**values)
+                    db.session.add(recording)
+                    db.session.flush()
+                    recording_id = recording.id
+                db.session.commit()
                 
                 logging.info(f"Processing new file: {file_path}")
                 
@@ -54,32 +223,27 @@ class RealtimeFileMonitor(FileSystemEventHandler):
                 # Process file
                 file_info = self.file_processor.process_upload(file_path, filename)
                 if not file_info:
+                    # Release the claim; the file stays where it is
+                    db.session.execute(delete(Recording).where(Recording.id == recording_id))
+                    db.session.info['data_changed'] = True
+                    db.session.commit()
                     socketio.emit('file_error', {
                         'filename': filename,
                         'error': 'File processing failed'
                     })
                     return
                 
-                # Create database record
-                recording = Recording(
-                    filename=filename,
-                    original_filename=filename,
-                    file_path=file_path,
-                    file_size=file_info['original_size'],
-                    compressed_size=file_info['compressed_size'],
-                    compression_ratio=file_info['compression_ratio']
-                )
-                
-                db.session.add(recording)
-                db.session.commit()
-                
-                # Add to processing queue
-                queue_item = ProcessingQueue(recording_id=recording.id)
-                db.session.add(queue_item)
+                # Point the recording at the stored file and queue it for processing
+                recording = db.session.get(Recording, recording_id)
+                recording.file_path = file_info['file_path']
+                recording.file_size = file_info['original_size']
+                recording.compressed_size = file_info['compressed_size']
+                recording.compression_ratio = file_info['compression_ratio']
+                db.session.add(ProcessingQueue(recording_id=recording_id))
                 db.session.commit()
                 
                 # Emit upload complete
-                socketio.emit('file_uploaded', {
+                emit_batched('file_uploaded', {
                     'id': recording.id,
                     'filename': filename,
                     'size': file_info['original_size'],
@@ -88,8 +252,15 @@ class RealtimeFileMonitor(FileSystemEventHandler):
                     'timestamp': recording.upload_timestamp.isoformat()
                 })
                 
-                # Start RFI processing
-                self.rfi_detector.process_recording_async(recording.id)
+                # Queue RFI processing; a full queue leaves the recording pending
+                try:
+                    rfi_queue.put_nowait(recording.id)
+                except queue.Full:
+                    logging.warning(f"RFI queue full, leaving recording {recording.id} pending")
+                    socketio.emit('file_error', {
+                        'filename': filename,
+                        'error': 'RFI analysis queue is full (backpressure); recording left pending'
+                    })
                 
         except Exception as e:
             logging.error(f"Real-time file processing failed: {str(e)}")
@@ -100,8 +271,7 @@ class RealtimeFileMonitor(FileSystemEventHandler):
     
     def _is_audio_file(self, file_path):
         """Check if file is a supported audio format"""
-        audio_extensions = {'.wav', '.flac', '.ogg', '.mp3', '.aiff', '.au', '.raw', '.iq', '.bin'}
-        return os.path.splitext(file_path)[1].lower() in audio_extensions
+        return file_extension(file_path) in AUDIO_EXTENSIONS
 
 class RealtimeDataBroadcaster:
     """Broadcast real-time updates to connected clients"""
@@ -109,6 +279,8 @@ class RealtimeDataBroadcaster:
     def __init__(self):
         self.update_thread = None
         self.running = False
+        # Set after every database commit; wakes the loop to broadcast
+        self.data_changed = threading.Event()
     
     def start(self):
         """Start real-time data broadcasting"""
@@ -116,6 +288,7 @@ class RealtimeDataBroadcaster:
             return
         
         self.running = True
+        self.data_changed.set()
         self.update_thread = threading.Thread(target=self._broadcast_loop)
         self.update_thread.daemon = True
         self.update_thread.start()
@@ -124,12 +297,18 @@ class RealtimeDataBroadcaster:
     def stop(self):
         """Stop real-time data broadcasting"""
         self.running = False
+        self.data_changed.set()
         if self.update_thread:
             self.update_thread.join()
     
     def _broadcast_loop(self):
         """Main broadcasting loop"""
         while self.running:
+            self.data_changed.wait(BROADCAST_HEARTBEAT)
+            self.data_changed.clear()
+            if not self.running:
+                break
+            
             try:
                 with app.app_context():
                     # Broadcast current statistics
@@ -140,7 +319,8 @@ class RealtimeDataBroadcaster:
                     recent_activity = self._get_recent_activity()
                     socketio.emit('activity_update', recent_activity)
                 
-                time.sleep(5)  # Update every 5 seconds
+                # Commits arriving meanwhile are coalesced into the next broadcast
+                time.sleep(BROADCAST_MIN_INTERVAL)
                 
             except Exception as e:
                 logging.error(f"Broadcasting error: {str(e)}")
@@ -148,59 +328,162 @@ class RealtimeDataBroadcaster:
     
     def _get_current_stats(self):
         """Get current system statistics"""
-        from models import Recording, RFIDetection
-        
-        total_recordings = Recording.query.count()
-        total_detections = RFIDetection.query.count()
-        processing_count = ProcessingQueue.query.filter_by(status='processing').count()
-        pending_count = ProcessingQueue.query.filter_by(status='pending').count()
-        
-        return {
-            'total_recordings': total_recordings,
-            'total_detections': total_detections,
-            'processing_count': processing_count,
-            'pending_count': pending_count,
-            'timestamp': datetime.now().isoformat()
-        }
+        stats = dict(_cached_current_stats(get_data_version(), int(time.time() // BROADCAST_CACHE_TTL)))
+        stats['timestamp'] = datetime.now().isoformat()
+        return stats
     
     def _get_recent_activity(self):
         """Get recent activity for live updates"""
-        from models import Recording, RFIDetection
-        
-        # Get recent recordings
-        recent_recordings = Recording.query.order_by(
-            Recording.upload_timestamp.desc()
-        ).limit(5).all()
-        
-        # Get recent detections
-        recent_detections = RFIDetection.query.order_by(
-            RFIDetection.detected_at.desc()
-        ).limit(10).all()
+        return _cached_recent_activity(get_data_version(), int(time.time() // BROADCAST_CACHE_TTL))
+
+def epoch_ms(timestamp):
+    """Milliseconds since the epoch for a naive UTC datetime, as JavaScript's Date expects"""
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+@lru_cache(maxsize=2)
+def _cached_current_stats(data_version, time_bucket):
+    """Dashboard counters; the arguments only participate in the cache key"""
+    total_recordings, total_detections, processing_count, pending_count = db.session.execute(select(
+        select(func.count(Recording.id)).scalar_subquery(),
+        select(func.count(RFIDetection.id)).scalar_subquery(),
+        select(func.count(ProcessingQueue.id)).where(ProcessingQueue.status == 'processing').scalar_subquery(),
+        select(func.count(ProcessingQueue.id)).where(ProcessingQueue.status == 'pending').scalar_subquery()
+    )).one()
+    
+    return {
+        'total_recordings': total_recordings,
+        'total_detections': total_detections,
+        'processing_count': processing_count,
+        'pending_count': pending_count
+    }
+
+@lru_cache(maxsize=2)
+def _cached_recent_activity(data_version, time_bucket):
+    """Latest recordings and detections for the live feed; the arguments only participate in the cache key"""
+    # Only the columns the live feed sends
+    recent_recordings = db.session.execute(
+        select(
+            Recording.id,
+            Recording.original_filename,
+            Recording.upload_timestamp,
+            Recording.processed,
+            Recording.rfi_detected
+        ).order_by(Recording.upload_timestamp.desc()).limit(5)
+    ).all()
+    
+    recent_detections = db.session.execute(
+        select(
+            RFIDetection.id,
+            RFIDetection.recording_id,
+            RFIDetection.frequency,
+            RFIDetection.power_level,
+            RFIDetection.interference_type,
+            RFIDetection.detected_at
+        ).order_by(RFIDetection.detected_at.desc()).limit(10)
+    ).all()
+    
+    return {
+        'recent_recordings': [{
+            'id': r.id,
+            'filename': r.original_filename,
+            'upload_time': epoch_ms(r.upload_timestamp),
+            'processed': r.processed,
+            'rfi_detected': r.rfi_detected
+        } for r in recent_recordings],
+        'recent_detections': [{
+            'id': d.id,
+            'recording_id': d.recording_id,
+            'frequency': d.frequency,
+            'power_level': d.power_level,
+            'interference_type': d.interference_type,
+            'detected_at': epoch_ms(d.detected_at)
+        } for d in recent_detections]
+    }
+
+# Events queued with emit_batched() are broadcast together in one 'bulk_update'
+EMIT_BATCH_SIZE = 32
+EMIT_BATCH_INTERVAL = 0.05  # seconds
+emit_queue = queue.Queue()
+_emit_flusher = None
+_emit_flusher_lock = threading.Lock()
+
+def emit_batched(event, data):
+    """Queue a broadcast for the next 'bulk_update' instead of emitting it inline"""
+    global _emit_flusher
+    
+    emit_queue.put({'event': event, 'data': data})
+    if _emit_flusher is None:
+        with _emit_flusher_lock:
+            if _emit_flusher is None:
+                _emit_flusher = socketio.start_background_task(_flush_emit_queue)
+
+def _flush_emit_queue():
+    """Send queued events in batches of up to EMIT_BATCH_SIZE every EMIT_BATCH_INTERVAL"""
+    while True:
+        batch = [emit_queue.get()]
+        socketio.sleep(EMIT_BATCH_INTERVAL)
+        while len(batch) < EMIT_BATCH_SIZE:
+            try:
+                batch.append(emit_queue.get_nowait())
+            except queue.Empty:
+                break
         
-        return {
-            'recent_recordings': [{
-                'id': r.id,
-                'filename': r.original_filename,
-                'upload_time': r.upload_timestamp.isoformat(),
-                'processed': r.processed,
-                'rfi_detected': r.rfi_detected
-            } for r in recent_recordings],
-            'recent_detections': [{
-                'id': d.id,
-                'recording_id': d.recording_id,
-                'frequency': d.frequency,
-                'power_level': d.power_level,
-                'interference_type': d.interference_type,
-                'detected_at': d.detected_at.isoformat()
-            } for d in recent_detections]
-        }
+        try:
+            socketio.emit('bulk_update', batch)
+        except Exception as e:
+            logging.error(f"Batched emit failed: {str(e)}")
 
 # Global instances
 file_monitor = None
 data_broadcaster = None
+_start_lock = threading.Lock()
+
+def _notify_broadcaster(session):
+    """Wake the broadcaster after any commit (uploads, monitor inserts, detection results)"""
+    if data_broadcaster is not None:
+        data_broadcaster.data_changed.set()
+
+event.listen(Session, 'after_commit', _notify_broadcaster)
 
 def start_realtime_monitoring():
-    """Start real-time monitoring services"""
+    """Start real-time monitoring services (no-op if already running in this process)"""
+    global file_monitor, data_broadcaster
+    
+    with _start_lock:
+        if data_broadcaster is not None:
+            return
+        _start_monitoring_services()
+
+def _filesystem_type(path):
+    """Type of the filesystem holding path from /proc/mounts, or None where that isn't available"""
+    try:
+        with open('/proc/mounts') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    
+    path = os.path.realpath(path)
+    best_mount, best_type = '', None
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best_mount):
+            best_mount, best_type = mount_point, fs_type
+    return best_type
+
+def create_observer(audio_dir):
+    """Native observer for local disks, PollingObserver for network mounts (or as configured)"""
+    backend = app.config['FILE_MONITOR_BACKEND']
+    if backend == 'auto':
+        fs_type = _filesystem_type(audio_dir)
+        if fs_type and (fs_type in NETWORK_FILESYSTEMS or fs_type.startswith('fuse')):
+            logging.info(f"{audio_dir} is on {fs_type}; polling for new files")
+            backend = 'polling'
+    
+    if backend == 'polling':
+        return PollingObserver(timeout=POLLING_INTERVAL)
+    return Observer()
+
+def _start_monitoring_services():
     global file_monitor, data_broadcaster
     
     try:
@@ -208,9 +491,11 @@ def start_realtime_monitoring():
         audio_dir = app.config['AUDIO_DIRECTORY']
         if os.path.exists(audio_dir):
             file_monitor = RealtimeFileMonitor()
-            observer = Observer()
+            observer = create_observer(audio_dir)
             observer.schedule(file_monitor, audio_dir, recursive=True)
             observer.start()
+            for _ in range(RFI_QUEUE_WORKERS):
+                threading.Thread(target=_rfi_worker, daemon=True).start()
             logging.info(f"File monitoring started for: {audio_dir}")
         else:
             logging.warning(f"Audio directory not found: {audio_dir}")
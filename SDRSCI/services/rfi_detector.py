@@ -1,271 +1,449 @@
 import numpy as np
-import scipy.signal
-import scipy.io.wavfile
+from numpy.lib.stride_tricks import sliding_window_view
+import io
 import threading
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, fields
 from datetime import datetime
+from functools import lru_cache
 import os
 
-from app import db, socketio
-from models import Recording, RFIDetection, ProcessingQueue
+from services.file_processor import COMPRESSED_SUFFIX, open_recording, read_wav_header, recording_format
 
-class RFIDetector:
-    def __init__(self):
-        self.processing_lock = threading.Lock()
+# Threads each analysis process may use for batched FFTs, splitting the cores between processes
+ANALYSIS_PROCESSES = int(os.environ.get('RFI_WORKER_PROCESSES', 2))
+FFT_WORKERS = max(1, (os.cpu_count() or 1) // ANALYSIS_PROCESSES)
+
+# SciPy is imported by _load_scipy() when the first recording is analyzed. Analysis
+# runs in the worker processes, so the web server process never pays for scipy.signal
+scipy = None
+pyfftw = None
+
+@lru_cache(maxsize=None)
+def _load_scipy():
+    """Import the SciPy modules used for analysis, with pyFFTW as the FFT backend if installed"""
+    global scipy, pyfftw
+    import scipy.fft
+    import scipy.io.wavfile
+    import scipy.signal
     
+    try:
+        # FFTW for every scipy.fft transform (including scipy.signal's), reusing its
+        # plans between recordings; FFTW threads are capped like pocketfft's workers
+        import pyfftw
+        import pyfftw.interfaces.scipy_fft
+        pyfftw.interfaces.cache.enable()
+        pyfftw.config.NUM_THREADS = FFT_WORKERS
+        scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+    except ImportError:  # scipy's bundled pocketfft
+        pyfftw = None
+
+# Spectrogram bins sampled (every Nth) for the fast detector's median/std threshold
+THRESHOLD_SAMPLE_STEP = 10
+
+# STFT windows transformed per batch in the complex-capture analysis (4096-point
+# complex64 frames: 8 MiB per batch)
+STFT_TILE_FRAMES = 256
+
+# Named frequency bands as (low MHz, high MHz, label): inclusive, sorted and
+# non-overlapping, so a peak's band is found with one searchsorted per classification
+FAST_DETECTOR_BANDS = (
+    (88, 108, 'FM_broadcast'),
+    (174, 216, 'TV_broadcast'),
+    (470, 790, 'UHF_TV'),
+    (2400, 2500, 'WiFi_ISM'),
+)
+COMPLEX_DETECTOR_BANDS = (
+    (88, 108, 'FM_broadcast'),  # Only for peaks wider than 150 kHz
+    (144, 144, 'amateur_radio'),
+    (174, 216, 'TV_broadcast'),
+    (432, 432, 'amateur_radio'),
+    (800, 900, 'cellular'),
+    (1296, 1296, 'amateur_radio'),
+    (1800, 1900, 'cellular'),
+    (2400, 2500, 'WiFi_ISM'),
+)
+
+def _band_table(bands):
+    """Lower edges, upper edges and labels of a band list; the extra last label ('') means no band"""
+    lows, highs, labels = zip(*bands)
+    return np.array(lows, dtype=float), np.array(highs, dtype=float), np.array(labels + ('',))
+
+_FAST_BAND_TABLE = _band_table(FAST_DETECTOR_BANDS)
+_COMPLEX_BAND_TABLE = _band_table(COMPLEX_DETECTOR_BANDS)
+
+def _band_labels(freq_mhz, band_table):
+    """Band label of each frequency (MHz), or '' where it falls outside every band"""
+    lows, highs, labels = band_table
+    band = np.searchsorted(lows, freq_mhz, side='right') - 1
+    band[(band < 0) | (freq_mhz > highs[band])] = -1
+    return labels[band]
+
+@lru_cache(maxsize=8)
+def _hann(window_size):
+    """Periodic Hann window in single precision, shared read-only between calls"""
+    window = scipy.signal.windows.hann(window_size, sym=False).astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+@lru_cache(maxsize=16)
+def _fftfreqs(window_size, sample_rate):
+    """Zero-centred two-sided FFT bin frequencies (Hz), shared read-only between calls"""
+    frequencies = scipy.fft.fftshift(scipy.fft.fftfreq(window_size, 1 / sample_rate))
+    frequencies.flags.writeable = False
+    return frequencies
+
+# Uploaded recordings are processed concurrently, each job on its own scoped DB session;
+# bounded so an upload burst queues jobs instead of starting a thread apiece
+_recording_jobs = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                     thread_name_prefix='rfi-job')
+
+# Signal analysis runs in worker processes so FFT-heavy recordings don't hold the
+# web server's GIL; spawned (not forked) because the server process is threaded.
+# Workers only import this module, so it must not import the app at module level
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+
+def get_analysis_pool():
+    """Return the shared process pool used for RFI analysis, starting it on first use"""
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is None:
+            _analysis_pool = ProcessPoolExecutor(
+                max_workers=ANALYSIS_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _analysis_pool
+
+def _discard_analysis_pool(pool):
+    """Drop a broken analysis pool so the next job starts a fresh one"""
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is pool:
+            _analysis_pool = None
+    pool.shutdown(wait=False)
+
+def run_analysis(file_path, sample_rate, file_size=None):
+    """analyze_recording_file in the analysis pool, retrying once on a fresh pool if a worker died"""
+    for attempt in range(2):
+        pool = get_analysis_pool()
+        try:
+            return pool.submit(analyze_recording_file, file_path, sample_rate, file_size).result()
+        except BrokenProcessPool:
+            # A dead worker (e.g. OOM-killed) breaks the pool for every job in flight
+            logging.warning(f"RFI analysis pool broke while analyzing {file_path}; restarting it")
+            _discard_analysis_pool(pool)
+            if attempt:
+                raise
+
+@dataclass
+class Detections:
+    """RFI detections as parallel NumPy columns, one entry per detection"""
+    timestamp: np.ndarray
+    frequency: np.ndarray
+    power_level: np.ndarray
+    bandwidth: np.ndarray
+    confidence: np.ndarray
+    interference_type: np.ndarray
+    
+    @classmethod
+    def empty(cls):
+        return cls(*(np.empty(0) for _ in range(5)), np.empty(0, dtype=str))
+    
+    def __len__(self):
+        return len(self.timestamp)
+    
+    def take(self, indices):
+        """The detections at the given indices, in that order"""
+        return Detections(*(getattr(self, column.name)[indices] for column in fields(self)))
+    
+    def to_rows(self, recording_id):
+        """Rows for a multi-row INSERT into rfi_detections"""
+        return [{
+            'recording_id': recording_id,
+            'timestamp': timestamp,
+            'frequency': frequency,
+            'power_level': power_level,
+            'bandwidth': bandwidth,
+            'confidence': confidence,
+            'interference_type': interference_type
+        } for timestamp, frequency, power_level, bandwidth, confidence, interference_type in zip(
+            *(getattr(self, column.name).tolist() for column in fields(self))
+        )]
+
+def analyze_recording_file(file_path, sample_rate=None, file_size=None):
+    """Detect RFI in a recording file; returns (detections, sample_rate, duration)"""
+    detector = RFIDetector()
+    detections, sample_rate = detector._analyze_audio_file(file_path, sample_rate)
+    return detections, sample_rate, detector._get_audio_duration(file_path, file_size)
+
+class RFIDetector:
     def process_recording_async(self, recording_id):
-        """Start RFI detection processing in a background thread"""
-        thread = threading.Thread(target=self._process_recording, args=(recording_id,))
-        thread.daemon = True
-        thread.start()
+        """Queue RFI detection processing on the shared recording job pool"""
+        return _recording_jobs.submit(self.process_recording, recording_id)
     
-    def _process_recording(self, recording_id):
+    def process_recording(self, recording_id):
         """Process a recording for RFI detection with real-time updates"""
-        from app import app
+        from app import app, db, socketio
+        from models import Recording, RFIDetection, ProcessingQueue
         
-        with self.processing_lock:
-            with app.app_context():
-                try:
-                    # Update queue status
-                    queue_item = ProcessingQueue.query.filter_by(recording_id=recording_id).first()
-                    if queue_item:
-                        queue_item.status = 'processing'
-                        queue_item.started_at = datetime.utcnow()
-                        db.session.commit()
-                        
-                        # Emit real-time update
-                        socketio.emit('processing_started', {
-                            'recording_id': recording_id,
-                            'status': 'processing',
-                            'timestamp': datetime.utcnow().isoformat()
-                        })
-                    
-                    recording = Recording.query.get(recording_id)
-                    if not recording:
-                        raise ValueError(f"Recording {recording_id} not found")
-                    
-                    logging.info(f"Starting RFI processing for recording {recording_id}")
-                    
-                    # Load and analyze the audio file
-                    detections = self._analyze_audio_file(recording.file_path, recording)
-                    
-                    # Save detections to database
-                    detection_count = 0
-                    for detection_data in detections:
-                        detection = RFIDetection(
-                            recording_id=recording_id,
-                            timestamp=detection_data['timestamp'],
-                            frequency=detection_data['frequency'],
-                            power_level=detection_data['power_level'],
-                            bandwidth=detection_data.get('bandwidth'),
-                            confidence=detection_data.get('confidence', 0.0),
-                            interference_type=detection_data.get('type', 'unknown')
-                        )
-                        db.session.add(detection)
-                        detection_count += 1
-                        
-                        # Emit real-time detection updates
-                        if detection_count % 10 == 0:  # Every 10 detections
-                            socketio.emit('detection_progress', {
-                                'recording_id': recording_id,
-                                'detections_found': detection_count,
-                                'latest_detection': {
-                                    'frequency': detection_data['frequency'],
-                                    'power_level': detection_data['power_level'],
-                                    'type': detection_data.get('type', 'unknown')
-                                }
-                            })
-                    
-                    # Update recording status
-                    recording.processed = True
-                    recording.rfi_detected = len(detections) > 0
-                    recording.duration = self._get_audio_duration(recording.file_path)
-                    recording.processing_completed_at = datetime.utcnow()
-                    
-                    # Update queue status
-                    if queue_item:
-                        queue_item.status = 'completed'
-                        queue_item.completed_at = datetime.utcnow()
-                    
+        with app.app_context():
+            try:
+                # Update queue status
+                queue_item = ProcessingQueue.query.filter_by(recording_id=recording_id).first()
+                if queue_item:
+                    queue_item.status = 'processing'
+                    queue_item.started_at = datetime.utcnow()
                     db.session.commit()
                     
-                    # Emit completion update
-                    socketio.emit('processing_completed', {
+                    # Emit real-time update
+                    socketio.emit('processing_started', {
+                        'recording_id': recording_id,
+                        'status': 'processing',
+                        'timestamp': datetime.utcnow().isoformat()
+                    })
+                
+                recording = Recording.query.get(recording_id)
+                if not recording:
+                    raise ValueError(f"Recording {recording_id} not found")
+                
+                logging.info(f"Starting RFI processing for recording {recording_id}")
+                
+                # Load and analyze the audio file in an analysis worker process; file_size
+                # is the uncompressed size, which headerless formats' duration is estimated from
+                detections, sample_rate, duration = run_analysis(
+                    recording.file_path, recording.sample_rate, recording.file_size
+                )
+                recording.sample_rate = sample_rate
+                
+                # Save detections to database in a single multi-row INSERT
+                detection_rows = detections.to_rows(recording_id)
+                detection_count = len(detection_rows)
+                RFIDetection.bulk_insert(db.session, detection_rows)
+                
+                # Update recording status
+                recording.processed = True
+                recording.rfi_detected = len(detections) > 0
+                recording.duration = duration
+                recording.processing_completed_at = datetime.utcnow()
+                
+                # Update queue status
+                if queue_item:
+                    queue_item.status = 'completed'
+                    queue_item.completed_at = datetime.utcnow()
+                
+                db.session.commit()
+                
+                # Real-time updates go out once the transaction is closed: one for the
+                # batch, carrying the strongest detection, then completion
+                if detection_rows:
+                    strongest = detection_rows[0]
+                    socketio.emit('detection_progress', {
                         'recording_id': recording_id,
                         'detections_found': detection_count,
-                        'rfi_detected': recording.rfi_detected,
-                        'duration': recording.duration,
-                        'completed_at': recording.processing_completed_at.isoformat()
+                        'latest_detection': {
+                            'frequency': strongest['frequency'],
+                            'power_level': strongest['power_level'],
+                            'type': strongest['interference_type']
+                        }
                     })
+                
+                socketio.emit('processing_completed', {
+                    'recording_id': recording_id,
+                    'detections_found': detection_count,
+                    'rfi_detected': recording.rfi_detected,
+                    'duration': recording.duration,
+                    'completed_at': recording.processing_completed_at.isoformat()
+                })
+                
+                logging.info(f"RFI processing completed for recording {recording_id}, found {len(detections)} detections")
+                
+            except Exception as e:
+                logging.error(f"RFI processing failed for recording {recording_id}: {str(e)}")
+                # The failure may have been a flush or commit, which leaves the session unusable
+                db.session.rollback()
+                
+                # Update queue with error
+                queue_item = ProcessingQueue.query.filter_by(recording_id=recording_id).first()
+                if queue_item:
+                    queue_item.status = 'failed'
+                    queue_item.error_message = str(e)
+                    queue_item.completed_at = datetime.utcnow()
+                    db.session.commit()
                     
-                    logging.info(f"RFI processing completed for recording {recording_id}, found {len(detections)} detections")
-                    
-                except Exception as e:
-                    logging.error(f"RFI processing failed for recording {recording_id}: {str(e)}")
-                    
-                    # Update queue with error
-                    queue_item = ProcessingQueue.query.filter_by(recording_id=recording_id).first()
-                    if queue_item:
-                        queue_item.status = 'failed'
-                        queue_item.error_message = str(e)
-                        queue_item.completed_at = datetime.utcnow()
-                        db.session.commit()
-                        
-                        # Emit error update
-                        socketio.emit('processing_failed', {
-                            'recording_id': recording_id,
-                            'error': str(e),
-                            'timestamp': datetime.utcnow().isoformat()
-                        })
+                    # Emit error update
+                    socketio.emit('processing_failed', {
+                        'recording_id': recording_id,
+                        'error': str(e),
+                        'timestamp': datetime.utcnow().isoformat()
+                    })
+            finally:
+                # Hand the scoped session back to the pool; pool threads are reused
+                db.session.remove()
+    
+    def _read_wav(self, file_path):
+        """Read a WAV recording, decompressing it in memory if it is stored gzipped"""
+        if file_path.endswith(COMPRESSED_SUFFIX):
+            # wavfile reads through fileno() when it can, which would see the
+            # compressed bytes, so hand it an in-memory copy instead
+            with open_recording(file_path) as f:
+                return scipy.io.wavfile.read(io.BytesIO(f.read()))
+        try:
+            # Memory-mapped: only the samples that are actually used get paged in
+            return scipy.io.wavfile.read(file_path, mmap=True)
+        except ValueError:
+            # e.g. 24-bit PCM, which wavfile can't map
+            return scipy.io.wavfile.read(file_path)
     
-    def _analyze_audio_file(self, file_path, recording):
-        """Fast analyze audio file for RFI patterns"""
+    def _analyze_audio_file(self, file_path, sample_rate=None):
+        """Fast analyze audio file for RFI patterns; returns (detections, sample_rate)"""
+        _load_scipy()
         try:
             # Try to read as WAV file first
-            if file_path.lower().endswith('.wav'):
-                sample_rate, audio_data = scipy.io.wavfile.read(file_path)
+            if recording_format(file_path) == '.wav':
+                sample_rate, audio_data = self._read_wav(file_path)
             else:
                 # For other formats, try to use generic approach
-                return self._analyze_raw_data(file_path, recording)
+                return self._analyze_raw_data(file_path, sample_rate), sample_rate
             
-            # Convert to mono if stereo
-            if len(audio_data.shape) > 1:
-                audio_data = np.mean(audio_data, axis=1)
-            
-            # Limit data length for fast processing (max 30 seconds)
+            # Limit data length for fast processing (max 30 seconds); slicing
+            # first keeps the conversions below off the rest of the file
             max_samples = sample_rate * 30
             if len(audio_data) > max_samples:
                 audio_data = audio_data[:max_samples]
             
-            # Convert to float32 for faster processing
-            audio_data = audio_data.astype(np.float32)
-            if np.max(np.abs(audio_data)) > 0:
-                audio_data = audio_data / np.max(np.abs(audio_data))
+            # Convert to float32 for faster processing, averaging the channels of
+            # multichannel recordings without np.mean's float64 intermediate
+            if audio_data.ndim > 1:
+                channels = audio_data.shape[1]
+                mono = audio_data[:, 0].astype(np.float32)
+                for channel in range(1, channels):
+                    mono += audio_data[:, channel]
+                mono *= 1 / channels
+                audio_data = mono
+            else:
+                audio_data = audio_data.astype(np.float32)
             
-            # Update sample rate in recording
-            recording.sample_rate = sample_rate
+            # Normalize in place; the float32 array above is already a private copy.
+            # The peak magnitude comes from max and min, with no np.abs temporary
+            peak = max(audio_data.max(), -audio_data.min())
+            if peak > 0:
+                np.divide(audio_data, peak, out=audio_data)
             
-            return self._detect_rfi_patterns_fast(audio_data, sample_rate)
+            return self._detect_rfi_patterns_fast(audio_data, sample_rate), sample_rate
             
         except Exception as e:
             logging.error(f"Audio analysis failed: {str(e)}")
-            return []
+            return Detections.empty(), sample_rate
     
-    def _analyze_raw_data(self, file_path, recording):
+    def _analyze_raw_data(self, file_path, sample_rate=None):
         """Analyze raw/binary data files (common in radio astronomy)"""
         try:
-            # Read raw data - assume complex float32 format (common for SDR)
-            with open(file_path, 'rb') as f:
-                # Read file size to estimate sample count
-                file_size = os.path.getsize(file_path)
-                sample_count = file_size // 8  # 8 bytes per complex sample (float32 * 2)
-                
-                # Read data as complex float32
-                raw_data = np.fromfile(f, dtype=np.complex64, count=min(sample_count, 1000000))  # Limit to 1M samples
+            # Read raw data - assume complex float32 format (common for SDR),
+            # 8 bytes per sample (float32 * 2), limited to 1M samples
+            max_samples = 1000000
+            if file_path.endswith(COMPRESSED_SUFFIX):
+                with open_recording(file_path) as f:
+                    data = f.read(max_samples * 8)
+                raw_data = np.frombuffer(data, dtype=np.complex64, count=len(data) // 8)
+            else:
+                # Memory-mapped: the STFT pages samples in as it reaches them, no read copy
+                num_samples = min(os.path.getsize(file_path) // 8, max_samples)
+                raw_data = np.memmap(file_path, dtype=np.complex64, mode='r', shape=(num_samples,))
             
             # Use default sample rate if not specified
-            sample_rate = recording.sample_rate or 2048000  # 2 MHz default
+            sample_rate = sample_rate or 2048000  # 2 MHz default
             
             return self._detect_rfi_patterns_complex(raw_data, sample_rate)
             
         except Exception as e:
             logging.error(f"Raw data analysis failed: {str(e)}")
-            return []
+            return Detections.empty()
     
-    def _get_audio_duration(self, file_path):
-        """Get audio file duration in seconds"""
+    def _get_audio_duration(self, file_path, file_size=None):
+        """Get audio file duration in seconds; file_size is the uncompressed size if known"""
         try:
-            if file_path.lower().endswith('.wav'):
-                sample_rate, audio_data = scipy.io.wavfile.read(file_path)
-                return len(audio_data) / sample_rate
+            if recording_format(file_path) == '.wav':
+                return read_wav_header(file_path)['duration']
             else:
-                # For other formats, estimate based on file size
-                file_size = os.path.getsize(file_path)
+                # For other formats, estimate based on file size; a .gz archive's own
+                # size understates it by the compression ratio
+                file_size = file_size or os.path.getsize(file_path)
                 estimated_duration = file_size / (2048000 * 4)  # Rough estimate
                 return estimated_duration
         except:
             return None
     
-    def _classify_interference_fast(self, frequency, power_level):
-        """Fast classify the type of interference"""
-        freq_mhz = frequency / 1e6
-        
-        # Quick classification based on frequency ranges
-        if 88 <= freq_mhz <= 108:
-            return 'FM_broadcast'
-        elif 174 <= freq_mhz <= 216:
-            return 'TV_broadcast'  
-        elif 470 <= freq_mhz <= 790:
-            return 'UHF_TV'
-        elif 2400 <= freq_mhz <= 2500:
-            return 'WiFi_ISM'
-        elif power_level > -20:
-            return 'strong_local'
-        elif power_level > -40:
-            return 'moderate'
-        else:
-            return 'weak_signal'
+    def _classify_interference_fast(self, frequencies, power_levels):
+        """Fast classify the type of interference for arrays of peaks"""
+        # Named bands first, then power level for peaks outside them
+        band_labels = _band_labels(frequencies / 1e6, _FAST_BAND_TABLE)
+        return np.where(
+            band_labels != '',
+            band_labels,
+            np.select([power_levels > -20, power_levels > -40], ['strong_local', 'moderate'], default='weak_signal')
+        )
+    
+    def _power_db(self, power):
+        """Power spectral density in dB, clipped to the fast detector's -100..50 dB range"""
+        return np.clip(10 * np.log10(power + 1e-10), -100, 50)
     
     def _detect_rfi_patterns_fast(self, audio_data, sample_rate):
         """Fast detect RFI patterns in real-valued audio data"""
-        detections = []
+        _load_scipy()
+        detections = Detections.empty()
         
         try:
-            # Fast parameters for analysis
-            window_size = min(2048, len(audio_data) // 4)  # Smaller window for speed
+            # Fast parameters for analysis; FFT sizes with only small prime factors
+            window_size = scipy.fft.next_fast_len(min(2048, len(audio_data) // 4), real=True)  # Smaller window for speed
             hop_length = window_size // 4
             
-            # Compute spectrogram with reduced resolution
-            frequencies, times, spectrogram = scipy.signal.spectrogram(
-                audio_data, 
-                fs=sample_rate,
-                window='hann',
-                nperseg=window_size,
-                noverlap=hop_length
-            )
-            
-            # Convert to dB with clipping
-            spectrogram_db = np.clip(10 * np.log10(spectrogram + 1e-10), -100, 50)
-            
-            # Fast threshold-based detection
-            median_power = np.median(spectrogram_db)
-            std_power = np.std(spectrogram_db)
+            # Compute one-sided (rfft) power spectrogram with reduced resolution
+            with scipy.fft.set_workers(FFT_WORKERS):
+                frequencies, times, spectrogram = scipy.signal.spectrogram(
+                    audio_data, 
+                    fs=sample_rate,
+                    window=_hann(window_size),
+                    nperseg=window_size,
+                    noverlap=hop_length,
+                    return_onesided=True,
+                    mode='psd'
+                )
+            
+            # Fast threshold-based detection on the clipped dB scale; statistics from
+            # every 10th bin are within a fraction of a dB of the full ones
+            power_sample = self._power_db(spectrogram.ravel()[::THRESHOLD_SAMPLE_STEP])
+            median_power = np.median(power_sample)
+            std_power = np.std(power_sample)
             threshold = median_power + 2 * std_power
             
-            # Find peaks above threshold
-            peak_indices = np.where(spectrogram_db > threshold)
-            
-            # Sample detections for speed (every 5th detection)
-            for i in range(0, len(peak_indices[0]), 5):
-                f_idx = peak_indices[0][i] 
-                t_idx = peak_indices[1][i]
-                
-                power = spectrogram_db[f_idx, t_idx]
-                freq = frequencies[f_idx]
-                time = times[t_idx]
-                
-                # Fast interference classification
-                interference_type = self._classify_interference_fast(freq, power)
-                
+            # Find peaks above threshold, sampling every 5th for speed. dB is monotonic in
+            # power, so the threshold is compared in linear power and only the peaks are
+            # converted; clipped levels never exceed a threshold of 50 dB or more
+            linear_threshold = 10 ** (threshold / 10) - 1e-10 if threshold < 50 else np.inf
+            f_indices, t_indices = np.nonzero(spectrogram > linear_threshold)
+            f_indices, t_indices = f_indices[::5], t_indices[::5]
+            powers = self._power_db(spectrogram[f_indices, t_indices])
+            
+            # Limit detections for performance: keep the 100 strongest before building dicts
+            if powers.size > 100:
+                strongest = np.argpartition(-powers, 100)[:100]
+                f_indices, t_indices, powers = f_indices[strongest], t_indices[strongest], powers[strongest]
+            
+            peak_frequencies = frequencies[f_indices]
+            detections = Detections(
+                timestamp=times[t_indices],
+                frequency=peak_frequencies,
+                power_level=powers,
                 # Simple bandwidth estimation
-                bandwidth = sample_rate / window_size
-                
+                bandwidth=np.full(powers.size, sample_rate / window_size),
                 # Confidence based on power level
-                confidence = min((power - threshold) / std_power, 1.0)
-                
-                detections.append({
-                    'timestamp': float(time),
-                    'frequency': float(freq),
-                    'power_level': float(power),
-                    'bandwidth': float(bandwidth),
-                    'confidence': float(confidence),
-                    'type': interference_type
-                })
-            
-            # Limit detections for performance
-            if len(detections) > 100:
-                detections.sort(key=lambda x: x['power_level'], reverse=True)
-                detections = detections[:100]
+                confidence=np.minimum((powers - threshold) / std_power, 1.0),
+                interference_type=self._classify_interference_fast(peak_frequencies, powers)
+            )
             
             # Filter out detections that are too close together (avoid duplicates)
             detections = self._filter_nearby_detections(detections)
@@ -277,72 +455,59 @@ class RFIDetector:
     
     def _detect_rfi_patterns_complex(self, complex_data, sample_rate):
         """Detect RFI patterns in complex-valued SDR data"""
-        detections = []
+        _load_scipy()
+        detections = Detections.empty()
         
         try:
             # Parameters for analysis
             window_size = 4096
             hop_length = window_size // 4
             
-            # Compute FFT-based spectrogram for complex data
-            frequencies = np.fft.fftfreq(window_size, 1/sample_rate)
-            frequencies = np.fft.fftshift(frequencies)
-            
-            num_windows = (len(complex_data) - window_size) // hop_length + 1
-            spectrogram = np.zeros((window_size, num_windows))
-            
-            for i in range(num_windows):
-                start_idx = i * hop_length
-                end_idx = start_idx + window_size
-                window_data = complex_data[start_idx:end_idx]
-                
-                # Apply window and FFT
-                windowed_data = window_data * np.hanning(window_size)
-                fft_data = np.fft.fft(windowed_data)
-                fft_data = np.fft.fftshift(fft_data)
-                
-                # Store power spectrum
-                spectrogram[:, i] = np.abs(fft_data) ** 2
-            
-            # Convert to dB
-            spectrogram_db = 10 * np.log10(spectrogram + 1e-10)
-            
-            # Create time axis
-            times = np.arange(num_windows) * hop_length / sample_rate
+            # Two-sided STFT with zero frequency centred, over the windows that lie
+            # entirely inside the capture (no edge padding); single precision throughout
+            window = _hann(window_size)
+            frames = sliding_window_view(complex_data.astype(np.complex64, copy=False), window_size)[::hop_length]
+            frequencies = _fftfreqs(window_size, sample_rate)
+            times = (np.arange(len(frames)) * hop_length + window_size // 2) / sample_rate  # Window centres
+            
+            # Transform STFT_TILE_FRAMES windows at a time so the windowed frames, FFT
+            # output and power temporaries stay tile-sized; only the dB result is kept
+            spectrogram_db = np.empty((len(frames), window_size), dtype=np.float32)
+            with scipy.fft.set_workers(FFT_WORKERS):
+                for start in range(0, len(frames), STFT_TILE_FRAMES):
+                    tile = scipy.fft.fftshift(scipy.fft.fft(frames[start:start + STFT_TILE_FRAMES] * window, axis=1), axes=1)
+                    np.log10(tile.real ** 2 + tile.imag ** 2 + 1e-10, out=spectrogram_db[start:start + STFT_TILE_FRAMES])
+            spectrogram_db *= 10
+            
+            # Power spectrum in dB, laid out frequency x time
+            spectrogram_db = spectrogram_db.T
             
             # Detect strong signals
             threshold = np.mean(spectrogram_db) + 3 * np.std(spectrogram_db)
             
-            detection_count = 0
-            for t_idx, time in enumerate(times):
-                for f_idx, freq in enumerate(frequencies):
-                    power = spectrogram_db[f_idx, t_idx]
-                    
-                    if power > threshold:
-                        # Calculate bandwidth
-                        bandwidth = self._estimate_bandwidth(spectrogram_db[:, t_idx], f_idx, frequencies)
-                        
-                        # Classify interference type
-                        interference_type = self._classify_interference(power, bandwidth, freq)
-                        
-                        # Calculate confidence
-                        confidence = min(1.0, (power - threshold) / (np.max(spectrogram_db) - threshold))
-                        
-                        detections.append({
-                            'timestamp': float(time),
-                            'frequency': float(freq),
-                            'power_level': float(power),
-                            'bandwidth': float(bandwidth),
-                            'confidence': float(confidence),
-                            'type': interference_type
-                        })
-                        
-                        detection_count += 1
-                        if detection_count > 200:  # Limit for performance
-                            break
-                
-                if detection_count > 200:
-                    break
+            # Locate every bin above threshold in one vectorized pass (time-major order)
+            t_indices, f_indices = np.nonzero(spectrogram_db.T > threshold)
+            
+            # Limit for performance
+            t_indices = t_indices[:201]
+            f_indices = f_indices[:201]
+            max_power = np.max(spectrogram_db)
+            
+            # Calculate bandwidths for all peaks at once
+            bandwidths = self._estimate_bandwidths(spectrogram_db, f_indices, t_indices, frequencies)
+            
+            powers = spectrogram_db[f_indices, t_indices]
+            peak_frequencies = frequencies[f_indices]
+            detections = Detections(
+                timestamp=times[t_indices],
+                frequency=peak_frequencies,
+                power_level=powers,
+                bandwidth=bandwidths,
+                # Calculate confidence
+                confidence=np.minimum(1.0, (powers - threshold) / (max_power - threshold)),
+                # Classify interference types
+                interference_type=self._classify_interference(powers, bandwidths, peak_frequencies)
+            )
             
             # Filter nearby detections
             detections = self._filter_nearby_detections(detections)
@@ -352,94 +517,71 @@ class RFIDetector:
         
         return detections
     
-    def _estimate_bandwidth(self, power_spectrum, peak_idx, frequencies):
-        """Estimate bandwidth of interference signal"""
+    def _estimate_bandwidths(self, spectrogram_db, f_indices, t_indices, frequencies):
+        """Estimate bandwidth of each interference peak from its -3dB points"""
         try:
-            # Find -3dB points around the peak
-            peak_power = power_spectrum[peak_idx]
-            threshold = peak_power - 3.0
-            
-            # Search left and right from peak
-            left_idx = peak_idx
-            right_idx = peak_idx
-            
-            while left_idx > 0 and power_spectrum[left_idx] > threshold:
-                left_idx -= 1
-            
-            while right_idx < len(power_spectrum) - 1 and power_spectrum[right_idx] > threshold:
-                right_idx += 1
-            
-            # Calculate bandwidth
-            if right_idx > left_idx:
-                bandwidth = abs(frequencies[right_idx] - frequencies[left_idx])
-            else:
-                bandwidth = abs(frequencies[1] - frequencies[0])  # Single bin width
-            
-            return bandwidth
+            # One row per peak: the spectrum of its time slice
+            spectra = spectrogram_db[:, t_indices].T
+            num_bins = spectra.shape[1]
+            peaks = f_indices[:, None]
+            bins = np.arange(num_bins)
+            below = spectra <= (spectrogram_db[f_indices, t_indices] - 3.0)[:, None]
+            
+            # Nearest bin at or below -3dB on each side of the peak; the walk stops
+            # at the first/last bin when there is none
+            left_candidates = below & (bins >= 1) & (bins <= peaks)
+            right_candidates = below & (bins >= peaks) & (bins <= num_bins - 2)
+            left_idx = np.where(left_candidates.any(axis=1),
+                                num_bins - 1 - np.argmax(left_candidates[:, ::-1], axis=1), 0)
+            right_idx = np.where(right_candidates.any(axis=1),
+                                 np.argmax(right_candidates, axis=1), num_bins - 1)
+            
+            # Calculate bandwidth, falling back to a single bin width
+            bin_width = abs(frequencies[1] - frequencies[0])
+            return np.where(right_idx > left_idx,
+                            np.abs(frequencies[right_idx] - frequencies[left_idx]), bin_width)
             
         except Exception:
             # Fallback to single bin bandwidth
-            return abs(frequencies[1] - frequencies[0]) if len(frequencies) > 1 else 1000.0
+            bin_width = abs(frequencies[1] - frequencies[0]) if len(frequencies) > 1 else 1000.0
+            return np.full(len(f_indices), bin_width)
     
-    def _classify_interference(self, power_level, bandwidth, frequency):
-        """Classify the type of interference based on characteristics"""
-        freq_mhz = frequency / 1e6
-        bw_khz = bandwidth / 1e3
-        
-        # FM broadcast
-        if 88 <= freq_mhz <= 108 and bw_khz > 150:
-            return 'FM_broadcast'
-        
-        # TV broadcast
-        elif 174 <= freq_mhz <= 216:
-            return 'TV_broadcast'
-        
-        # WiFi/ISM band
-        elif 2400 <= freq_mhz <= 2500:
-            return 'WiFi_ISM'
+    def _classify_interference(self, power_levels, bandwidths, frequencies):
+        """Classify the type of interference for arrays of peaks based on characteristics"""
+        bw_khz = bandwidths / 1e3
         
-        # Amateur radio bands
-        elif freq_mhz in [144, 432, 1296]:  # Near amateur frequencies
-            return 'amateur_radio'
-        
-        # Cellular
-        elif 800 <= freq_mhz <= 900 or 1800 <= freq_mhz <= 1900:
-            return 'cellular'
-        
-        # Narrowband vs wideband classification
-        elif bw_khz < 25:
-            return 'narrowband'
-        elif bw_khz > 100:
-            return 'wideband'
-        else:
-            return 'unknown'
+        # Named bands first (FM broadcast only when wideband), then bandwidth for the rest
+        band_labels = _band_labels(frequencies / 1e6, _COMPLEX_BAND_TABLE)
+        band_labels[(band_labels == 'FM_broadcast') & (bw_khz <= 150)] = ''
+        return np.where(
+            band_labels != '',
+            band_labels,
+            np.select([bw_khz < 25, bw_khz > 100], ['narrowband', 'wideband'], default='unknown')
+        )
     
     def _filter_nearby_detections(self, detections):
         """Filter out detections that are too close in time/frequency"""
-        if not detections:
+        if not len(detections):
             return detections
         
-        # Sort by power level (strongest first)
-        detections.sort(key=lambda x: x['power_level'], reverse=True)
+        # Strongest first (stable, so equal powers keep their order)
+        order = np.argsort(-detections.power_level, kind='stable')
+        times = detections.timestamp[order]
+        freqs = detections.frequency[order]
         
-        filtered = []
-        for detection in detections:
-            # Check if this detection is too close to existing ones
-            too_close = False
-            for existing in filtered:
-                time_diff = abs(detection['timestamp'] - existing['timestamp'])
-                freq_diff = abs(detection['frequency'] - existing['frequency'])
-                
-                # If within 0.1 seconds and 1 kHz, consider it a duplicate
-                if time_diff < 0.1 and freq_diff < 1000:
-                    too_close = True
-                    break
-            
-            if not too_close:
-                filtered.append(detection)
-                
-                # Limit total detections
-                if len(filtered) >= 50:
-                    break
+        # Pairs within 0.1 seconds and 1 kHz are duplicates; at most a few hundred candidates
+        too_close = (np.abs(times[:, None] - times) < 0.1) & (np.abs(freqs[:, None] - freqs) < 1000)
+        
+        kept = []
+        suppressed = np.zeros(len(order), dtype=bool)
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            kept.append(i)
+            
+            # Limit total detections
+            if len(kept) >= 50:
+                break
+            suppressed |= too_close[i]
         
-        return filtered
+        return detections.take(order[kept])
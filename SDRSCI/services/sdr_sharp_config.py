@@ -3,36 +3,49 @@
 SDR Sharp Auto-Configuration for RFI Detection
 Automatically configures SDR Sharp with optimal settings for radio astronomy RFI monitoring
 """
+import io
 import os
 import xml.etree.ElementTree as ET
 import shutil
 import logging
 from pathlib import Path
 
+# Executable names shipped by the different SDR Sharp builds, in order of preference
+SDR_SHARP_EXECUTABLES = ('SDRSharp.dotnet8.exe', 'SDRSharp.exe', 'sdrsharp.exe')
+
 class SDRSharpConfigurator:
     def __init__(self, sdr_path, audio_output_path):
         self.sdr_path = Path(sdr_path)
         self.audio_output_path = Path(audio_output_path)
         self.config_file = self.sdr_path / "SDRSharp.exe.config"
-        
+        self.preset_file = self.sdr_path / "RFI_Presets.xml"
+    
+    def create_all(self):
+        """Write the SDR Sharp configuration and, if that succeeds, the frequency presets"""
+        success = self.create_optimal_config()
+        if success:
+            self.create_preset_frequencies()
+        return success
+    
     def create_optimal_config(self):
         """Create optimal SDR Sharp configuration for RFI detection"""
         try:
             # Ensure audio output directory exists
             self.audio_output_path.mkdir(parents=True, exist_ok=True)
             
-            # Backup existing config if it exists
+            # Keep the existing config as a backup; a hard link shares its data
+            # instead of copying it, and the new config replaces the name atomically
             if self.config_file.exists():
                 backup_file = self.config_file.with_suffix('.config.backup')
-                shutil.copy2(self.config_file, backup_file)
+                backup_file.unlink(missing_ok=True)
+                try:
+                    os.link(self.config_file, backup_file)
+                except OSError:  # Filesystem without hard links
+                    shutil.copy2(self.config_file, backup_file)
                 logging.info(f"Backed up existing config to {backup_file}")
             
             # Create optimized configuration
-            config_xml = self._generate_config_xml()
-            
-            # Write configuration file
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                f.write(config_xml)
+            _write_xml_atomic(self.config_file, self._generate_config_tree())
             
             logging.info("SDR Sharp configuration created successfully")
             return True
@@ -41,104 +54,71 @@ class SDRSharpConfigurator:
             logging.error(f"Failed to create SDR Sharp config: {str(e)}")
             return False
     
-    def _generate_config_xml(self):
+    def _generate_config_tree(self):
         """Generate optimized SDR Sharp configuration XML"""
         audio_path_normalized = str(self.audio_output_path).replace('\\', '\\\\')
         
-        config = f"""<?xml version="1.0" encoding="utf-8"?>
-<configuration>
-  <configSections>
-    <sectionGroup name="userSettings" type="System.Configuration.UserSettingsGroup, System, Version=4.0.0.0, Culture=neutral, PublicKeyToken=b77a5c561934e089">
-      <section name="SDRSharp.Properties.Settings" type="System.Configuration.ClientSettingsSection, System, Version=4.0.0.0, Culture=neutral, PublicKeyToken=b77a5c561934e089" allowExeDefinition="MachineToLocalUser" requirePermission="false" />
-    </sectionGroup>
-  </configSections>
-  <userSettings>
-    <SDRSharp.Properties.Settings>
-      <!-- Audio Recording Settings for RFI Detection -->
-      <setting name="AudioRecordingEnabled" serializeAs="String">
-        <value>True</value>
-      </setting>
-      <setting name="AudioRecordingFormat" serializeAs="String">
-        <value>WAV</value>
-      </setting>
-      <setting name="AudioRecordingSampleRate" serializeAs="String">
-        <value>48000</value>
-      </setting>
-      <setting name="AudioRecordingBitDepth" serializeAs="String">
-        <value>16</value>
-      </setting>
-      <setting name="AudioRecordingPath" serializeAs="String">
-        <value>{audio_path_normalized}</value>
-      </setting>
-      <setting name="AudioRecordingAutoStart" serializeAs="String">
-        <value>False</value>
-      </setting>
-      
-      <!-- SDR Configuration for RFI Detection -->
-      <setting name="SampleRate" serializeAs="String">
-        <value>2400000</value>
-      </setting>
-      <setting name="RFGain" serializeAs="String">
-        <value>25</value>
-      </setting>
-      <setting name="IFGain" serializeAs="String">
-        <value>22</value>
-      </setting>
-      <setting name="AudioGain" serializeAs="String">
-        <value>50</value>
-      </setting>
-      
-      <!-- Frequency Settings -->
-      <setting name="Frequency" serializeAs="String">
-        <value>146000000</value>
-      </setting>
-      <setting name="DetectorType" serializeAs="String">
-        <value>WFM</value>
-      </setting>
-      <setting name="FilterBandwidth" serializeAs="String">
-        <value>200000</value>
-      </setting>
-      
-      <!-- Display Settings -->
-      <setting name="WaterfallAttack" serializeAs="String">
-        <value>0.9</value>
-      </setting>
-      <setting name="WaterfallDecay" serializeAs="String">
-        <value>0.6</value>
-      </setting>
-      <setting name="SpectrumAnalyzerAttack" serializeAs="String">
-        <value>0.9</value>
-      </setting>
-      <setting name="SpectrumAnalyzerDecay" serializeAs="String">
-        <value>0.4</value>
-      </setting>
-      
-      <!-- RFI Detection Optimizations -->
-      <setting name="AGCEnabled" serializeAs="String">
-        <value>False</value>
-      </setting>
-      <setting name="AGCThreshold" serializeAs="String">
-        <value>-20</value>
-      </setting>
-      <setting name="SquelchEnabled" serializeAs="String">
-        <value>False</value>
-      </setting>
-      
-      <!-- Window and UI -->
-      <setting name="WindowState" serializeAs="String">
-        <value>Normal</value>
-      </setting>
-      <setting name="CenterFrequency" serializeAs="String">
-        <value>146000000</value>
-      </setting>
-    </SDRSharp.Properties.Settings>
-  </userSettings>
-  
-  <startup>
-    <supportedRuntime version="v4.0" sku=".NETFramework,Version=v4.8" />
-  </startup>
-</configuration>"""
-        return config
+        root = ET.Element('configuration')
+        
+        config_sections = ET.SubElement(root, 'configSections')
+        section_group = ET.SubElement(config_sections, 'sectionGroup', name='userSettings', type=(
+            'System.Configuration.UserSettingsGroup, System, Version=4.0.0.0, '
+            'Culture=neutral, PublicKeyToken=b77a5c561934e089'
+        ))
+        ET.SubElement(section_group, 'section', {
+            'name': 'SDRSharp.Properties.Settings',
+            'type': ('System.Configuration.ClientSettingsSection, System, Version=4.0.0.0, '
+                     'Culture=neutral, PublicKeyToken=b77a5c561934e089'),
+            'allowExeDefinition': 'MachineToLocalUser',
+            'requirePermission': 'false'
+        })
+        
+        settings = ET.SubElement(ET.SubElement(root, 'userSettings'), 'SDRSharp.Properties.Settings')
+        for comment, group in (
+            ('Audio Recording Settings for RFI Detection', (
+                ('AudioRecordingEnabled', 'True'),
+                ('AudioRecordingFormat', 'WAV'),
+                ('AudioRecordingSampleRate', '48000'),
+                ('AudioRecordingBitDepth', '16'),
+                ('AudioRecordingPath', audio_path_normalized),
+                ('AudioRecordingAutoStart', 'False'),
+            )),
+            ('SDR Configuration for RFI Detection', (
+                ('SampleRate', '2400000'),
+                ('RFGain', '25'),
+                ('IFGain', '22'),
+                ('AudioGain', '50'),
+            )),
+            ('Frequency Settings', (
+                ('Frequency', '146000000'),
+                ('DetectorType', 'WFM'),
+                ('FilterBandwidth', '200000'),
+            )),
+            ('Display Settings', (
+                ('WaterfallAttack', '0.9'),
+                ('WaterfallDecay', '0.6'),
+                ('SpectrumAnalyzerAttack', '0.9'),
+                ('SpectrumAnalyzerDecay', '0.4'),
+            )),
+            ('RFI Detection Optimizations', (
+                ('AGCEnabled', 'False'),
+                ('AGCThreshold', '-20'),
+                ('SquelchEnabled', 'False'),
+            )),
+            ('Window and UI', (
+                ('WindowState', 'Normal'),
+                ('CenterFrequency', '146000000'),
+            )),
+        ):
+            settings.append(ET.Comment(f' {comment} '))
+            for name, value in group:
+                setting = ET.SubElement(settings, 'setting', name=name, serializeAs='String')
+                ET.SubElement(setting, 'value').text = value
+        
+        startup = ET.SubElement(root, 'startup')
+        ET.SubElement(startup, 'supportedRuntime', version='v4.0', sku='.NETFramework,Version=v4.8')
+        
+        return ET.ElementTree(root)
     
     def create_preset_frequencies(self):
         """Create frequency presets for common RFI monitoring bands"""
@@ -152,8 +132,6 @@ class SDRSharpConfigurator:
             "Radio Quiet": 73000000
         }
         
-        preset_file = self.sdr_path / "RFI_Presets.xml"
-        
         try:
             root = ET.Element("presets")
             
@@ -164,25 +142,50 @@ class SDRSharpConfigurator:
                 ET.SubElement(preset, "mode").text = "WFM"
                 ET.SubElement(preset, "bandwidth").text = "200000"
             
-            tree = ET.ElementTree(root)
-            tree.write(preset_file, encoding='utf-8', xml_declaration=True)
+            _write_xml_atomic(self.preset_file, ET.ElementTree(root))
             
-            logging.info(f"Created RFI frequency presets: {preset_file}")
+            logging.info(f"Created RFI frequency presets: {self.preset_file}")
             return True
             
         except Exception as e:
             logging.error(f"Failed to create frequency presets: {str(e)}")
             return False
 
+def _write_xml_atomic(path, tree):
+    """Serialize an XML tree in memory and swap it into place with one write, fsync and rename"""
+    ET.indent(tree)
+    buffer = io.BytesIO()
+    tree.write(buffer, encoding='utf-8', xml_declaration=True)
+    data = memoryview(buffer.getbuffer())
+    
+    temp_path = f"{path}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    # Readers see either the old file or the complete new one
+    os.replace(temp_path, path)
+
 def configure_sdr_sharp(sdr_path, audio_path):
     """Configure SDR Sharp for optimal RFI detection"""
-    configurator = SDRSharpConfigurator(sdr_path, audio_path)
-    
-    success = configurator.create_optimal_config()
-    if success:
-        configurator.create_preset_frequencies()
+    return SDRSharpConfigurator(sdr_path, audio_path).create_all()
+
+def find_sdr_sharp_executable(sdr_path):
+    """Return the path of the SDR Sharp executable in sdr_path, or None if there isn't one"""
+    try:
+        # One directory listing instead of a stat per candidate name
+        with os.scandir(sdr_path) as entries:
+            files = {entry.name.lower(): entry.path for entry in entries if entry.is_file()}
+    except OSError:
+        return None
     
-    return success
+    for exe in SDR_SHARP_EXECUTABLES:
+        if exe.lower() in files:
+            return files[exe.lower()]
+    return None
 
 if __name__ == '__main__':
     # Test configuration
@@ -8,7 +8,8 @@ import subprocess
 import sys
 import os
 import json
-from pathlib import Path
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 def print_banner():
     print("=" * 60)
@@ -27,6 +28,27 @@ def check_python_version():
     print(f"✓ Python version: {sys.version.split()[0]}")
     return True
 
+def pip_install(packages, quiet=False, options=()):
+    """Install packages with a single pip run; returns whether pip succeeded"""
+    output = subprocess.DEVNULL if quiet else None
+    try:
+        subprocess.check_call([
+            sys.executable, '-m', 'pip', 'install', *options, *packages
+        ], stdout=output, stderr=output)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+def pip_download(package, dest):
+    """Download a package's wheels and its dependencies' into dest; returns (package, ok)"""
+    try:
+        subprocess.check_call([
+            sys.executable, '-m', 'pip', 'download', '--only-binary=:all:', '-d', dest, package
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return package, True
+    except subprocess.CalledProcessError:
+        return package, False
+
 def install_dependencies():
     """Install required Python packages"""
     print("📦 Installing dependencies...")
@@ -38,12 +60,13 @@ def install_dependencies():
         'flask-socketio>=5.3.0',
         'waitress>=3.0.0',
         'numpy>=1.21.0',
-        'scipy>=1.7.0',
+        'scipy>=1.12.0',  # ShortTimeFFT
         'requests>=2.25.0',
         'werkzeug>=3.0.0',
         'email-validator>=2.0.0',
         'watchdog>=3.0.0',
-        'python-socketio[client]>=5.8.0'
+        'python-socketio[client]>=5.8.0',
+        'python-dotenv>=1.0.0'  # Loads .env into the app's environment
     ]
     
     # Optional packages for enhanced functionality
@@ -51,7 +74,13 @@ def install_dependencies():
         'matplotlib>=3.5.0',
         'plotly>=5.0.0',
         'psycopg2-binary>=2.9.0',  # For PostgreSQL support
-        'gunicorn>=21.0.0'  # Alternative WSGI server
+        'streaming-form-data>=1.13.0',  # Faster multipart upload parsing
+        'orjson>=3.9.0',  # Faster JSON encoding for the API endpoints
+        'isal>=1.6.0',  # ISA-L accelerated gzip for recording compression
+        'mgzip>=0.2.1',  # Multi-threaded gzip for large recordings
+        'pyFFTW>=0.13.0',  # FFTW backend for the RFI detector's transforms
+        'gunicorn>=21.0.0',  # Alternative WSGI server (SERVER=gunicorn)
+        'gevent-websocket>=0.10.1'  # WebSocket worker for gunicorn
     ]
     
     try:
@@ -61,25 +90,35 @@ def install_dependencies():
             sys.executable, '-m', 'pip', 'install', '--upgrade', 'pip'
         ], stdout=subprocess.DEVNULL)
         
-        for package in core_packages:
-            try:
-                subprocess.check_call([
-                    sys.executable, '-m', 'pip', 'install', package
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                print(f"   ✓ {package.split('>=')[0]}")
-            except subprocess.CalledProcessError:
-                print(f"   ⚠ Failed to install {package}")
+        # One pip run resolves and downloads everything together; per-package
+        # installs only to report which package failed
+        if pip_install(core_packages):
+            print(f"   ✓ {len(core_packages)} core packages")
+        else:
+            for package in core_packages:
+                if pip_install([package], quiet=True):
+                    print(f"   ✓ {package.split('>=')[0]}")
+                else:
+                    print(f"   ⚠ Failed to install {package}")
         
         # Install optional packages (best effort)
         print("   Installing optional packages...")
-        for package in optional_packages:
-            try:
-                subprocess.check_call([
-                    sys.executable, '-m', 'pip', 'install', package
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                print(f"   ✓ {package.split('>=')[0]}")
-            except subprocess.CalledProcessError:
-                print(f"   - Skipped {package.split('>=')[0]} (optional)")
+        if pip_install(optional_packages):
+            print(f"   ✓ {len(optional_packages)} optional packages")
+        else:
+            # Optional packages are independent, so their downloads run concurrently;
+            # installs stay one at a time since parallel pip runs race on site-packages
+            with tempfile.TemporaryDirectory() as wheel_dir:
+                with ThreadPoolExecutor(max_workers=min(4, len(optional_packages))) as executor:
+                    downloaded = dict(executor.map(lambda package: pip_download(package, wheel_dir), optional_packages))
+                
+                for package in optional_packages:
+                    # Packages without wheels fall back to pip's own download and build
+                    options = ('--find-links', wheel_dir) if downloaded[package] else ()
+                    if pip_install([package], quiet=True, options=options):
+                        print(f"   ✓ {package.split('>=')[0]}")
+                    else:
+                        print(f"   - Skipped {package.split('>=')[0]} (optional)")
         
         print("✓ Dependencies installed successfully")
         return True
@@ -88,6 +127,34 @@ def install_dependencies():
         print(f"❌ Failed to install dependencies: {e}")
         return False
 
+def make_directories(directories):
+    """Create relative '/'-separated directory paths and their parents, walking each shared parent once"""
+    if os.mkdir not in os.supports_dir_fd:  # e.g. Windows
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+        return
+    
+    # Open a directory fd only for paths that have subdirectories to create
+    parents = {'/'.join(parts[:depth]) for parts in (directory.split('/') for directory in directories)
+               for depth in range(1, len(parts))}
+    fds = {'': os.open('.', os.O_RDONLY | os.O_DIRECTORY)}
+    try:
+        for directory in sorted(directories, key=lambda directory: directory.count('/')):
+            parent = ''
+            for component in directory.split('/'):
+                path = f"{parent}/{component}" if parent else component
+                if path not in fds:
+                    try:
+                        os.mkdir(component, 0o755, dir_fd=fds[parent])
+                    except FileExistsError:
+                        pass
+                    if path in parents:
+                        fds[path] = os.open(component, os.O_RDONLY | os.O_DIRECTORY, dir_fd=fds[parent])
+                parent = path
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+
 def create_directories():
     """Create necessary directories"""
     print("📁 Creating directories...")
@@ -102,8 +169,8 @@ def create_directories():
         'services'
     ]
     
+    make_directories(directories)
     for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
         print(f"   ✓ {directory}")
     
     print("✓ Directories created")
@@ -128,18 +195,15 @@ def setup_environment():
         'THREADS': '4'
     }
     
-    # Set environment variables for this session
-    for key, value in env_vars.items():
-        os.environ[key] = value
-        print(f"   ✓ {key}")
-    
-    # Create .env file for future reference
+    # The app loads .env when it is imported (including by initialize_database below);
+    # variables already set in the environment take precedence
     try:
         with open('.env', 'w') as f:
             f.write("# NRAO Spectrum Sentinels Environment Variables\n")
-            f.write("# Copy these to your shell or use a .env loader\n\n")
+            f.write("# Loaded by app.py on startup; shell variables override these\n\n")
             for key, value in env_vars.items():
                 f.write(f'export {key}="{value}"\n')
+                print(f"   ✓ {key}")
         
         print("✓ Environment configured (.env file created)")
     except Exception as e:
@@ -173,9 +237,18 @@ def check_project_files():
         'services/sdr_sharp_config.py'
     ]
     
+    # One listing per directory instead of a stat per file
+    present = set()
+    for directory in {os.path.dirname(file_path) for file_path in required_files}:
+        try:
+            with os.scandir(directory or '.') as entries:
+                present.update(os.path.join(directory, entry.name).replace(os.sep, '/') for entry in entries)
+        except OSError:
+            pass
+    
     missing_files = []
     for file_path in required_files:
-        if not Path(file_path).exists():
+        if file_path not in present:
             missing_files.append(file_path)
         else:
             print(f"   ✓ {file_path}")
@@ -220,22 +293,8 @@ def create_run_script():
 """
 Quick start script for NRAO Spectrum Sentinels
 """
-import os
-import sys
-
-# Set environment variables
-env_vars = {
-    'DATABASE_URL': 'sqlite:///spectrum_sentinels.db',
-    'SESSION_SECRET': 'spectrum-sentinels-dev-key',
-    'UPLOAD_FOLDER': 'uploads',
-    'AUDIO_DIRECTORY': 'audio_recordings',
-    'DEBUG': 'true',
-    'HOST': '0.0.0.0',
-    'PORT': '5000'
-}
 
-for key, value in env_vars.items():
-    os.environ[key] = value
+# Settings come from .env (written by setup_local.py), loaded when the app is imported
 
 # Import and run the application
 if __name__ == '__main__':
@@ -53,6 +53,13 @@ class RealtimeClient {
             this.updateActivityFeed(data);
         });
         
+        // Batched broadcasts: replay each event to the handlers registered for it
+        this.socket.on('bulk_update', (batch) => {
+            batch.forEach(({ event, data }) => {
+                this.socket.listeners(event).forEach(handler => handler(data));
+            });
+        });
+        
         this.socket.on('file_uploaded', (data) => {
             this.handleFileUploaded(data);
         });
@@ -3,6 +3,7 @@ import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
+from sqlalchemy import event, text
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
@@ -40,10 +41,29 @@ os.makedirs(app.config['AUDIO_DIRECTORY'], exist_ok=True)
 db.init_app(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling so detection inserts don't block dashboard reads"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64MB
+    cursor.close()
+
 with app.app_context():
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        event.listen(db.engine, "connect", _set_sqlite_pragmas)
+    
     # Import models to ensure tables are created
     import models
     db.create_all()
+    # create_all skips tables that already exist; add indexes introduced since
+    for index in models.RFIDetection.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    # ...and drop the ones they replaced: frequency leads ix_rfi_freq_power
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_rfi_detections_frequency"))
 
 # Import routes after app initialization
 import routes
\ No newline at end of file
@@ -1,53 +1,102 @@
 import os
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import ClassVar
 
+import numpy as np
+
+# Radio Astronomy Bands (MHz); read-only, so every importer can share the one mapping
+RADIO_ASTRONOMY_BANDS = MappingProxyType({key: MappingProxyType(band) for key, band in {
+    'h1_line': {'min': 1420, 'max': 1421, 'name': 'Hydrogen Line', 'priority': 'critical'},
+    'continuum_74': {'min': 73, 'max': 75, 'name': '74 MHz Continuum', 'priority': 'high'},
+    'continuum_150': {'min': 149, 'max': 151, 'name': '150 MHz Continuum', 'priority': 'high'},
+    'continuum_325': {'min': 324, 'max': 326, 'name': '325 MHz Continuum', 'priority': 'high'},
+    'l_band': {'min': 1400, 'max': 1700, 'name': 'L-band', 'priority': 'medium'},
+    'c_band': {'min': 4800, 'max': 5000, 'name': 'C-band', 'priority': 'medium'},
+    'protected_1610': {'min': 1610.6, 'max': 1613.8, 'name': 'Protected 1610', 'priority': 'critical'},
+    'protected_1660': {'min': 1660, 'max': 1670, 'name': 'Protected 1660', 'priority': 'critical'},
+    'protected_2690': {'min': 2690, 'max': 2700, 'name': 'Protected 2690', 'priority': 'critical'},
+}.items()})
+
+def _first_band(freq_mhz):
+    """Key of the first band, in RADIO_ASTRONOMY_BANDS order, containing freq_mhz (linear scan)"""
+    return next((key for key, band in RADIO_ASTRONOMY_BANDS.items()
+                 if band['min'] <= freq_mhz <= band['max']), None)
+
+# Sorted band edges with the band at each edge and in each gap around them (the first gap
+# is below every band, the last above), so a lookup is one binary search even though
+# bands nest, e.g. the hydrogen line inside L-band
+_BAND_EDGES = np.unique([edge for band in RADIO_ASTRONOMY_BANDS.values() for edge in (band['min'], band['max'])])
+_EDGE_BANDS = np.array([_first_band(edge) for edge in _BAND_EDGES], dtype=object)
+_GAP_BANDS = np.array(
+    [None] + [_first_band((low + high) / 2) for low, high in zip(_BAND_EDGES[:-1], _BAND_EDGES[1:])] + [None],
+    dtype=object
+)
+
+def band_for(freq_mhz: float) -> str | None:
+    """Key of the radio astronomy band containing freq_mhz (MHz), or None; nested bands resolve in table order"""
+    index = int(np.searchsorted(_BAND_EDGES, freq_mhz))
+    if index < len(_BAND_EDGES) and _BAND_EDGES[index] == freq_mhz:
+        return _EDGE_BANDS[index]
+    return _GAP_BANDS[index]
+
+def band_for_array(freqs_mhz) -> np.ndarray:
+    """band_for over an array of frequencies (MHz) in one vectorized pass; an object array of keys/None"""
+    freqs_mhz = np.asarray(freqs_mhz, dtype=float)
+    index = np.searchsorted(_BAND_EDGES, freqs_mhz)
+    edge_index = np.minimum(index, len(_BAND_EDGES) - 1)
+    return np.where(_BAND_EDGES[edge_index] == freqs_mhz, _EDGE_BANDS[edge_index], _GAP_BANDS[index])
+
+# Not slotted: slots would replace the class-level defaults with member descriptors,
+# and app.config.from_object(Config) reads them off the class
+@dataclass(frozen=True)
 class Config:
     """Enhanced application configuration"""
     
     # Database
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///spectrum_sentinels.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_DATABASE_URI: str = os.environ.get('DATABASE_URL', 'sqlite:///spectrum_sentinels.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS: bool = False
     
     # Security
-    SECRET_KEY = os.environ.get('SESSION_SECRET', 'spectrum-sentinels-dev-key')
+    SECRET_KEY: str = os.environ.get('SESSION_SECRET', 'spectrum-sentinels-dev-key')
     
     # File uploads
-    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
-    MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB
+    UPLOAD_FOLDER: str = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    MAX_CONTENT_LENGTH: int = 500 * 1024 * 1024  # 500MB
     
     # SDR Configuration
-    SDR_SHARP_PATH = os.environ.get('SDR_SHARP_PATH', r'C:\Users\coraj\OneDrive\Desktop\sdrsharp-x86')
-    AUDIO_DIRECTORY = os.environ.get('AUDIO_DIRECTORY', 'audio_recordings')
+    SDR_SHARP_PATH: str = os.environ.get('SDR_SHARP_PATH', r'C:\Users\coraj\OneDrive\Desktop\sdrsharp-x86')
+    AUDIO_DIRECTORY: str = os.environ.get('AUDIO_DIRECTORY', 'audio_recordings')
     
     # External APIs
-    SCISTARTER_API_KEY = os.environ.get('SCISTARTER_API_KEY', 'demo-key')
-    SCISTARTER_PROJECT_ID = os.environ.get('SCISTARTER_PROJECT_ID', 'spectrumx-spectrum-sentinels')
+    SCISTARTER_API_KEY: str = os.environ.get('SCISTARTER_API_KEY', 'demo-key')
+    SCISTARTER_PROJECT_ID: str = os.environ.get('SCISTARTER_PROJECT_ID', 'spectrumx-spectrum-sentinels')
     
     # File compression
-    COMPRESSION_ENABLED = True
-    COMPRESSION_LEVEL = 6  # Balance between speed and compression ratio
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_LEVEL: int = 6  # Balance between speed and compression ratio
     
     # Real-time processing
-    REALTIME_UPDATES = True
-    WEBSOCKET_PING_INTERVAL = 25
-    WEBSOCKET_PING_TIMEOUT = 60
+    REALTIME_UPDATES: bool = True
+    WEBSOCKET_PING_INTERVAL: int = 25
+    WEBSOCKET_PING_TIMEOUT: int = 60
     
     # Enhanced audio processing
-    SUPPORTED_SAMPLE_RATES = [8000, 16000, 22050, 44100, 48000, 96000, 192000]
-    DEFAULT_SAMPLE_RATE = 48000
+    SUPPORTED_SAMPLE_RATES: tuple = (8000, 16000, 22050, 44100, 48000, 96000, 192000)
+    DEFAULT_SAMPLE_RATE: int = 48000
     
     # RFI Detection settings
-    RFI_DETECTION_THRESHOLD = -80  # dB
-    RFI_CONFIDENCE_THRESHOLD = 0.7
-    
-    # Radio Astronomy Bands (MHz)
-    RADIO_ASTRONOMY_BANDS = {
-        'h1_line': {'min': 1420, 'max': 1421, 'name': 'Hydrogen Line', 'priority': 'critical'},
-        'continuum_74': {'min': 73, 'max': 75, 'name': '74 MHz Continuum', 'priority': 'high'},
-        'continuum_150': {'min': 149, 'max': 151, 'name': '150 MHz Continuum', 'priority': 'high'},
-        'continuum_325': {'min': 324, 'max': 326, 'name': '325 MHz Continuum', 'priority': 'high'},
-        'l_band': {'min': 1400, 'max': 1700, 'name': 'L-band', 'priority': 'medium'},
-        'c_band': {'min': 4800, 'max': 5000, 'name': 'C-band', 'priority': 'medium'},
-        'protected_1610': {'min': 1610.6, 'max': 1613.8, 'name': 'Protected 1610', 'priority': 'critical'},
-        'protected_1660': {'min': 1660, 'max': 1670, 'name': 'Protected 1660', 'priority': 'critical'},
-        'protected_2690': {'min': 2690, 'max': 2700, 'name': 'Protected 2690', 'priority': 'critical'},
-    }
+    RFI_DETECTION_THRESHOLD: int = -80  # dB
+    RFI_CONFIDENCE_THRESHOLD: float = 0.7
+    
+    RADIO_ASTRONOMY_BANDS: ClassVar[MappingProxyType] = RADIO_ASTRONOMY_BANDS
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """The application configuration; environment-backed defaults are read when this module is imported"""
+    return Config()
+
+# Bound at import for `from config import CONFIG`; app.config.from_object(CONFIG) and
+# app.config.from_object(Config) load the same values
+CONFIG = get_config()
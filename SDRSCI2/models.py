@@ -64,13 +64,19 @@ class Recording(db.Model):
 
 class RFIDetection(db.Model):
     __tablename__ = 'rfi_detections'
+    __table_args__ = (
+        db.Index('ix_rfi_rec_ts', 'recording_id', 'timestamp'),
+        # Also serves frequency-only filters, so frequency has no index of its own
+        db.Index('ix_rfi_freq_power', 'frequency', 'power_level'),
+        db.Index('ix_rfi_astro_band', 'is_radio_astronomy_band', 'astronomy_band_name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     recording_id = db.Column(db.Integer, db.ForeignKey('recordings.id'), nullable=False, index=True)
     
     # Detection data
     timestamp = db.Column(db.Float, nullable=False)  # Time within recording
-    frequency = db.Column(db.Float, nullable=False, index=True)  # Hz
+    frequency = db.Column(db.Float, nullable=False)  # Hz
     power_level = db.Column(db.Float, nullable=False)  # dB
     bandwidth = db.Column(db.Float)  # Hz
     confidence = db.Column(db.Float, default=0.0)